@@ -1,9 +1,10 @@
 from talon import skia, cron, ctrl, scope, canvas, ui
 from talon.types import Point2d
 from abc import ABCMeta
-import numpy
+import math
 from .widget_preferences import HeadUpDisplayUserWidgetPreferences
 from .content.partial_content import HudPartialContent
+from .performance import performance_tracer, frame_profiler
 import copy
 
 class BaseWidget(metaclass=ABCMeta):
@@ -75,6 +76,7 @@ class BaseWidget(metaclass=ABCMeta):
         if self.preferences.current_topics is not None:
             self.current_topics = self.preferences.current_topics
             self.content.set_persisted_topics(self.preferences.current_topics)
+        self.event_dispatch.invalidate_content_routes()
         self.load_extra_preferences()
         
         # For re-enabling or disabling widgets after a reload ( mostly for talon hud environment changes )
@@ -111,6 +113,8 @@ class BaseWidget(metaclass=ABCMeta):
             self.animation_tick = self.animation_max_duration if self.show_animations else 0
 
     def content_handler(self, event) -> bool:
+        trace_start = performance_tracer.start()
+        performance_tracer.mark_handled(self.id, event.topic_type, event.topic)
         self.content.process_event(event)
         
         # Set the new content topics if they have changed
@@ -120,6 +124,7 @@ class BaseWidget(metaclass=ABCMeta):
             self.preferences.current_topics = self.current_topics
             self.preferences.mark_changed = True
             self.event_dispatch.request_persist_preferences()
+            self.event_dispatch.invalidate_content_routes()
         
         if not self.sleep_enabled and event.topic_type == "variable" and event.topic == "mode":
             if (event.content == "sleep"):
@@ -133,6 +138,8 @@ class BaseWidget(metaclass=ABCMeta):
         if self.enabled and self.canvas:
             self.canvas.resume()
             updated = True
+        
+        performance_tracer.record("content_handler", self.id, trace_start)
         return updated
 
     def update_panel(self, panel_content) -> bool:
@@ -202,6 +209,8 @@ class BaseWidget(metaclass=ABCMeta):
 
     # Central drawing cycle attached to the canvas
     def draw_cycle(self, canvas):
+        trace_start = performance_tracer.start()
+        frame_start = frame_profiler.start()
         continue_drawing = False
         
         if self.animation_tick != 0:
@@ -223,6 +232,10 @@ class BaseWidget(metaclass=ABCMeta):
             self.animation_tick = 0
             if not self.enabled:
                 self.clear()
+        
+        performance_tracer.record("draw", self.id, trace_start)
+        performance_tracer.mark_drawn(self.id)
+        frame_profiler.record_frame(self.id, frame_start, continue_drawing)
     
     def draw_setup_mode(self, canvas) -> skia.Paint:
         """Implements drawing the dimension lines when resizing elements"""    
@@ -432,7 +445,7 @@ class BaseWidget(metaclass=ABCMeta):
             
                 self.canvas.rect = rect
             elif (self.setup_type == "font_size"):
-                total_distance = numpy.linalg.norm(numpy.array(total_direction))
+                total_distance = math.hypot(total_direction.x, total_direction.y)
                 
                 # This number is tested using the distance from the corner of the screen to the opposite corner, which is slightly more than 2000 pixels on a 1920*1080 screen
                 # Aiming for a rough max font size of about 72
@@ -0,0 +1,47 @@
+import gc
+import time
+import tracemalloc
+
+# Shared measuring code for the benchmarks, every operation is timed first and then run again with allocation tracing
+# As tracemalloc slows down every allocation, the timings and the allocations are never measured in the same run
+
+def measure_operation(operation, iterations: int) -> dict:
+    """Runs an operation a number of times and returns the throughput and the allocations it made"""
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    duration = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    start_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(iterations):
+        operation()
+    end_size, peak_size = tracemalloc.get_traced_memory()
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated_blocks = sum(max(0, statistic.count_diff) for statistic in snapshot_after.compare_to(snapshot_before, "lineno"))
+    return {
+        "iterations": iterations,
+        "ops_per_second": iterations / duration if duration > 0 else float("inf"),
+        "mean_us": duration / iterations * 1000000,
+        "peak_kb": (peak_size - start_size) / 1024,
+        "retained_bytes_per_op": (end_size - start_size) / iterations,
+        "retained_blocks": allocated_blocks
+    }
+
+def print_header(title: str):
+    print("")
+    print(title)
+    print("{:<40} {:>12} {:>10} {:>10} {:>12} {:>10}".format("Operation", "ops/sec", "mean us", "peak KB", "retained B/op", "blocks"))
+
+def run_benchmark(name: str, operation, iterations: int) -> dict:
+    """Measures an operation and prints a single line with the results"""
+    results = measure_operation(operation, iterations)
+    print("{:<40} {:>12.1f} {:>10.2f} {:>10.1f} {:>12.1f} {:>10}".format(name, results["ops_per_second"], results["mean_us"],
+        results["peak_kb"], results["retained_bytes_per_op"], results["retained_blocks"]))
+    return results
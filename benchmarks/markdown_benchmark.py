@@ -0,0 +1,35 @@
+import os
+import time
+from .talon_stubs import import_hud_module, hud_directory
+
+# Run from the talon_hud directory with: python -m benchmarks.markdown_benchmark
+
+def read_markdown_documentation() -> str:
+    """Collects all the markdown documentation shipped with the HUD"""
+    documentation = []
+    for directory, _, filenames in os.walk(hud_directory):
+        for filename in sorted(filenames):
+            if filename.endswith(".md"):
+                with open(os.path.join(directory, filename), "r", encoding="utf-8") as md_file:
+                    documentation.append(md_file.read())
+    return "\n\n".join(documentation)
+
+def benchmark_markdown_conversion(md_to_richtext_content, name: str, md_content: str, iterations: int):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        md_to_richtext_content(md_content)
+    duration = time.perf_counter() - start
+    
+    print("{:<24} {:>10.1f} KB {:>10.1f} ops/sec {:>10.2f} MB/sec".format(name, len(md_content) / 1024,
+        iterations / duration, len(md_content) * iterations / duration / 1024 / 1024))
+
+def run_markdown_benchmark():
+    utils = import_hud_module("utils")
+    documentation = read_markdown_documentation()
+    
+    benchmark_markdown_conversion(utils.md_to_richtext_content, "All documentation", documentation, 50)
+    benchmark_markdown_conversion(utils.md_to_richtext_content, "Documentation x20", "\n\n".join([documentation] * 20), 5)
+    benchmark_markdown_conversion(utils.md_to_richtext_content, "Documentation x100", "\n\n".join([documentation] * 100), 2)
+
+if __name__ == "__main__":
+    run_markdown_benchmark()
@@ -0,0 +1,108 @@
+import itertools
+import os
+import tempfile
+from .talon_stubs import import_hud_module, run_pending_cron_jobs, hud_directory, Paint
+from .harness import print_header, run_benchmark
+
+# Run from the talon_hud directory with: python -m benchmarks.pipeline_benchmark
+# Drives the text layout, the content state and the display with synthetic workloads, without any Talon process
+
+short_log_text = "Said <*head up show/> and <+switched/> to command mode"
+panel_text = "\n".join(["Line " + str(index) + " with some <*bold/> and </italic/> words, enough to wrap around the width of a panel" for index in range(20)])
+
+def read_readme() -> str:
+    with open(os.path.join(hud_directory, "README.md"), "r", encoding="utf-8") as readme_file:
+        return readme_file.read()
+
+def create_headless_hud(preferences_directory: str):
+    """Loads the display and the content state the way Talon would, with the preferences written to the given directory"""
+    configuration = import_hud_module("configuration")
+    configuration.hud_configuration["user_preferences_folder"] = preferences_directory
+    configuration.hud_configuration["content_preferences_folder"] = preferences_directory
+
+    display = import_hud_module("display")
+    state = import_hud_module("content.state")
+    display.hud.connect_internal("HeadUpDisplayContent", state.hud_content)
+    display.hud.start()
+    display.hud.enable()
+    run_pending_cron_jobs()
+    return display.hud, state
+
+def run_layout_benchmarks(utils):
+    print_header("Text layout")
+    paint = Paint()
+    paint.textsize = 18
+    readme = read_readme()
+    counter = itertools.count()
+
+    run_benchmark("layout_rich_text short cached", lambda: utils.layout_rich_text(paint, short_log_text, 400), 20000)
+    run_benchmark("layout_rich_text short uncached", lambda: utils.layout_rich_text(paint, short_log_text + str(next(counter)), 400), 2000)
+    run_benchmark("layout_rich_text panel cached", lambda: utils.layout_rich_text(paint, panel_text, 400), 20000)
+    run_benchmark("layout_rich_text panel uncached", lambda: utils.layout_rich_text(paint, panel_text + str(next(counter)), 400), 100)
+    run_benchmark("layout_rich_text readme uncached", lambda: utils.layout_rich_text(paint, readme + str(next(counter)), 600), 10)
+
+def run_markdown_benchmarks(utils):
+    print_header("Markdown conversion")
+    readme = read_readme()
+    run_benchmark("md_to_richtext_content readme", lambda: utils.md_to_richtext_content(readme), 200)
+
+def run_publishing_benchmarks(hud, state):
+    print_header("Content publishing")
+    counter = itertools.count()
+    modes = itertools.cycle(["command", "dictation"])
+
+    run_benchmark("hud_add_log", lambda: state.Actions.hud_add_log("command", "Command " + str(next(counter))), 1000)
+    run_benchmark("hud_publish_content", lambda: state.Actions.hud_publish_content("Text " + str(next(counter)), "benchmark", "Benchmark"), 5000)
+    run_benchmark("update_topic_type variable", lambda: state.hud_content.update_topic_type("variable", "mode", next(modes)), 5000)
+
+    def publish_batch():
+        for _ in range(10):
+            state.Actions.hud_add_log("command", "Command " + str(next(counter)))
+            state.Actions.hud_publish_content("Text " + str(next(counter)), "benchmark", "Benchmark")
+        run_pending_cron_jobs()
+
+    state.hud_content.set_batch_events(True)
+    run_benchmark("batched 20 events and flush", publish_batch, 50)
+    state.hud_content.set_batch_events(False)
+
+def run_broadcast_benchmarks(hud, state, typing):
+    print_header("Display broadcasting")
+    counter = itertools.count()
+    panel_content = state.hud_content.topic_types["text"]["benchmark"]
+    replace_event = typing.HudContentEvent("text", "benchmark", panel_content, "replace", typing.CLAIM_WIDGET_TOPIC_TYPE, True)
+    log_message = typing.HudLogMessage(0, "command", "Command")
+
+    run_benchmark("broadcast_update replace text", lambda: hud.broadcast_update(replace_event), 10000)
+    run_benchmark("broadcast_update append log", lambda: hud.broadcast_update(typing.HudContentEvent("log_messages", "command", log_message, "append")), 2000)
+    run_benchmark("broadcast_update unrouted topic", lambda: hud.broadcast_update(typing.HudContentEvent("text", "unrouted " + str(next(counter) % 100), panel_content, "replace")), 10000)
+
+def run_partial_content_benchmarks(partial_content, typing):
+    print_header("Partial content")
+    topics = ["topic " + str(index) for index in range(20)]
+    content = partial_content.HudPartialContent(["text", "variable"])
+    for topic in topics:
+        content.set_topic("text", topic, "Content of " + topic)
+    counter = itertools.count()
+    dump_event = typing.HudContentEvent("*", "*", {"topic_types": {"text": {topic: "Dumped " + topic for topic in topics}}, "version": 1}, "dump")
+
+    run_benchmark("process_event replace", lambda: content.process_event(typing.HudContentEvent("text", topics[next(counter) % 20], "Replaced", "replace")), 50000)
+    run_benchmark("process_event dump 20 topics", lambda: content.process_event(dump_event), 20000)
+    run_benchmark("get_topic all 20 topics", lambda: content.get_topic("text"), 50000)
+    run_benchmark("get_variable", lambda: content.get_variable("mode", "command"), 50000)
+
+def run_pipeline_benchmark():
+    with tempfile.TemporaryDirectory() as preferences_directory:
+        utils = import_hud_module("utils")
+        typing = import_hud_module("content.typing")
+        partial_content = import_hud_module("content.partial_content")
+        hud, state = create_headless_hud(preferences_directory)
+
+        run_layout_benchmarks(utils)
+        run_markdown_benchmarks(utils)
+        run_publishing_benchmarks(hud, state)
+        run_broadcast_benchmarks(hud, state, typing)
+        run_partial_content_benchmarks(partial_content, typing)
+        hud.destroy()
+
+if __name__ == "__main__":
+    run_pipeline_benchmark()
@@ -0,0 +1,58 @@
+import argparse
+import tempfile
+import time
+import tracemalloc
+from .talon_stubs import import_hud_module
+from .pipeline_benchmark import create_headless_hud
+
+# Replays a recording made with the user.hud_start_event_recording action into the display
+# Run from the talon_hud directory with: python -m benchmarks.replay_benchmark <recording.jsonl> --speed 10
+# A speed of 0 replays the events as fast as possible, other speeds keep the recorded timing between events
+
+def replay_events(recorded_events: list, broadcast, speed: float, latency_histogram) -> float:
+    """Sends the recorded events to the broadcast callback, recording the latency of every event, and returns the total duration"""
+    start = time.perf_counter()
+    for offset, event in recorded_events:
+        if speed > 0:
+            delay = offset / speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+
+        event_start = time.perf_counter()
+        broadcast(event)
+        latency_histogram.record((time.perf_counter() - event_start) * 1000)
+    return time.perf_counter() - start
+
+def run_replay_benchmark(recording_path: str, speed: float, trace_allocations: bool):
+    with tempfile.TemporaryDirectory() as preferences_directory:
+        event_recording = import_hud_module("content.event_recording")
+        performance = import_hud_module("performance")
+        hud, state = create_headless_hud(preferences_directory)
+        recorded_events = event_recording.read_recorded_events(recording_path)
+        latency_histogram = performance.HudLatencyHistogram()
+
+        if trace_allocations:
+            tracemalloc.start()
+        duration = replay_events(recorded_events, hud.broadcast_update, speed, latency_histogram)
+        if trace_allocations:
+            _, peak_size = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        hud.destroy()
+
+    stats = latency_histogram.get_stats()
+    recorded_duration = recorded_events[-1][0] if recorded_events else 0
+    print("Replayed {} events recorded over {:.2f} seconds at {}".format(len(recorded_events), recorded_duration,
+        "unbounded speed" if speed <= 0 else "{:g}x speed".format(speed)))
+    print("Duration {:.3f} seconds, {:.1f} events/sec".format(duration, len(recorded_events) / duration if duration > 0 else 0))
+    print("Latency in ms - mean {:.3f}, p50 {:.3f}, p95 {:.3f}, p99 {:.3f}, max {:.3f}".format(stats["mean_ms"],
+        stats["p50_ms"], stats["p95_ms"], stats["p99_ms"], stats["max_ms"]))
+    if trace_allocations:
+        print("Peak traced memory {:.1f} KB".format(peak_size / 1024))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded stream of HUD content events into a headless display")
+    parser.add_argument("recording", help="The path to a recording made with user.hud_start_event_recording")
+    parser.add_argument("--speed", type=float, default=0, help="The replay speed, like 1 or 10, with 0 being unbounded")
+    parser.add_argument("--allocations", action="store_true", help="Trace the allocations during the replay, which slows it down")
+    arguments = parser.parse_args()
+    run_replay_benchmark(arguments.recording, arguments.speed, arguments.allocations)
@@ -0,0 +1,313 @@
+import importlib
+import os
+import sys
+import types
+
+# Stand-ins for the Talon modules the HUD imports, so parts of it can be benchmarked outside of Talon
+# These are only installed when a benchmark is run directly, Talon itself never calls into this file
+hud_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Rect:
+    def __init__(self, x: float = 0, y: float = 0, width: float = 0, height: float = 0):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        
+    def __eq__(self, other):
+        return isinstance(other, Rect) and self.x == other.x and self.y == other.y and \
+            self.width == other.width and self.height == other.height
+
+    def __repr__(self):
+        return "Rect(" + ", ".join([str(self.x), str(self.y), str(self.width), str(self.height)]) + ")"
+
+class Point2d:
+    def __init__(self, x: float = 0, y: float = 0):
+        self.x = x
+        self.y = y
+    
+    def __iter__(self):
+        return iter((self.x, self.y))
+
+class Font:
+    embolden = False
+    skew_x = 0
+
+# Deterministic character widths relative to the text size, so every run measures the exact same layout
+narrow_characters = "il.,:;'|!`"
+wide_characters = "mwMW@"
+
+class Paint:
+    typeface = None
+    textsize = 15
+    
+    def __init__(self):
+        self.font = Font()
+        
+    def measure_text(self, text: str):
+        advance = 0
+        for character in text:
+            if character in narrow_characters:
+                advance += self.textsize * 0.3
+            elif character in wide_characters:
+                advance += self.textsize * 0.9
+            else:
+                advance += self.textsize * 0.55
+        if self.font.embolden:
+            advance *= 1.05
+        
+        # Like skia, the bounds only cover the drawn characters and not the surrounding spaces
+        stripped_text = text.strip(" ")
+        if stripped_text == "":
+            return advance, Rect()
+        leading_advance = self.measure_text(text[:len(text) - len(text.lstrip(" "))])[0]
+        stripped_advance = self.measure_text(stripped_text)[0] if stripped_text != text else advance
+        return advance, Rect(leading_advance, -self.textsize * 0.75, stripped_advance, self.textsize)
+
+class RoundRect:
+    def __init__(self, rect: Rect, x: float = 0, y: float = 0):
+        self.rect = rect
+        self.x = x
+        self.y = y
+
+    @classmethod
+    def from_rect(cls, rect: Rect, x: float = 0, y: float = 0):
+        return cls(rect, x, y)
+
+class Image:
+    width = 0
+    height = 0
+
+    @classmethod
+    def from_file(cls, path: str):
+        return cls()
+
+class Screen:
+    def __init__(self, x: float = 0, y: float = 0, width: float = 1920, height: float = 1080):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.rect = Rect(x, y, width, height)
+        self.visible_rect = self.rect
+        self.mm_x = 527.0
+        self.mm_y = 296.0
+
+main_screen = Screen()
+
+# A canvas that never draws anything, only keeps track of its state and callbacks
+class Canvas:
+    blocks_mouse = False
+
+    def __init__(self, x: float = 0, y: float = 0, width: float = 0, height: float = 0):
+        self.rect = Rect(x, y, width, height)
+        self.paint = Paint()
+        self.callbacks = {}
+        self.resumed = False
+        self.frozen = False
+        self.closed = False
+
+    def register(self, event: str, callback):
+        self.callbacks.setdefault(event, []).append(callback)
+
+    def unregister(self, event: str, callback):
+        if event in self.callbacks and callback in self.callbacks[event]:
+            self.callbacks[event].remove(callback)
+
+    def resume(self):
+        self.resumed = True
+
+    def pause(self):
+        self.resumed = False
+
+    def freeze(self):
+        self.frozen = True
+
+    def move(self, x: float, y: float):
+        self.rect = Rect(x, y, self.rect.width, self.rect.height)
+
+    def close(self):
+        self.closed = True
+        self.resumed = False
+
+    def draw_text(self, *args):
+        pass
+
+    def draw_rect(self, *args):
+        pass
+
+    def draw_rrect(self, *args):
+        pass
+
+    def draw_circle(self, *args):
+        pass
+
+    def draw_line(self, *args):
+        pass
+
+    def draw_image(self, *args):
+        pass
+
+# Cron jobs are never run on their own, benchmarks flush them explicitly to keep the runs deterministic
+class CronJob:
+    def __init__(self, callback, repeating: bool):
+        self.callback = callback
+        self.repeating = repeating
+
+pending_cron_jobs = []
+
+def cron_after(duration: str, callback) -> CronJob:
+    job = CronJob(callback, False)
+    pending_cron_jobs.append(job)
+    return job
+
+def cron_interval(duration: str, callback) -> CronJob:
+    job = CronJob(callback, True)
+    pending_cron_jobs.append(job)
+    return job
+
+def cron_cancel(job: CronJob):
+    if job in pending_cron_jobs:
+        pending_cron_jobs.remove(job)
+
+def run_pending_cron_jobs():
+    """Runs every scheduled job once, removing the jobs that were scheduled with cron.after"""
+    for job in pending_cron_jobs[:]:
+        if not job.repeating:
+            cron_cancel(job)
+        job.callback()
+
+# Synchronous version of the Talon event dispatcher
+class Dispatch:
+    dispatch_callbacks = None
+
+    def register(self, topic: str, callback):
+        if self.dispatch_callbacks is None:
+            self.dispatch_callbacks = {}
+        self.dispatch_callbacks.setdefault(topic, []).append(callback)
+
+    def unregister(self, topic: str, callback):
+        if self.dispatch_callbacks is not None and topic in self.dispatch_callbacks \
+            and callback in self.dispatch_callbacks[topic]:
+            self.dispatch_callbacks[topic].remove(callback)
+
+    def dispatch(self, topic: str, *args):
+        if self.dispatch_callbacks is not None and topic in self.dispatch_callbacks:
+            for callback in self.dispatch_callbacks[topic][:]:
+                callback(*args)
+
+# Voice command declarations are accepted but ignored
+class Module:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+    def action_class(self, cls):
+        return cls
+
+    def action(self, function):
+        return function
+
+    def scope(self, function):
+        function.update = lambda *args: None
+        return function
+
+class Context:
+    def __init__(self):
+        self.lists = {}
+        self.tags = []
+        self.settings = {}
+        self.matches = ""
+
+    def action_class(self, path: str = ""):
+        return lambda cls: cls
+
+# Every action can be called, but does nothing
+class Actions:
+    def __getattr__(self, name):
+        return Actions()
+
+    def __call__(self, *args, **kwargs):
+        return None
+
+def ignore(*args, **kwargs):
+    return None
+
+def install_talon_stubs(talon_user_directory: str = hud_directory):
+    """Registers the stand-in talon modules, does nothing when the real Talon modules are available"""
+    if "talon" in sys.modules:
+        return
+    
+    talon = types.ModuleType("talon")
+    skia = types.ModuleType("talon.skia")
+    skia.Paint = Paint
+    skia.Shader = types.SimpleNamespace(linear_gradient=lambda *args: None)
+    skia.RoundRect = RoundRect
+    skia.Image = Image
+    ui = types.ModuleType("talon.ui")
+    ui.Rect = Rect
+    ui.Screen = Screen
+    ui.screens = lambda: [main_screen]
+    ui.main_screen = lambda: main_screen
+    ui.register = ignore
+    ui.unregister = ignore
+    ui.active_window = lambda: types.SimpleNamespace(title="", rect=main_screen.rect)
+    ui.active_app = lambda: types.SimpleNamespace(name="", bundle="", exe="")
+    talon_types = types.ModuleType("talon.types")
+    talon_types.Point2d = Point2d
+    talon_types_point = types.ModuleType("talon.types.point")
+    talon_types_point.Point2d = Point2d
+    talon_canvas = types.ModuleType("talon.canvas")
+    talon_canvas.Canvas = Canvas
+    cron = types.ModuleType("talon.cron")
+    cron.after = cron_after
+    cron.interval = cron_interval
+    cron.cancel = cron_cancel
+    scripting = types.ModuleType("talon.scripting")
+    scripting.Dispatch = Dispatch
+    talon_init = types.ModuleType("talon_init")
+    talon_init.TALON_USER = talon_user_directory
+    talon_init.TALON_HOME = talon_user_directory
+    
+    talon.skia = skia
+    talon.ui = ui
+    talon.types = talon_types
+    talon_types.point = talon_types_point
+    talon.canvas = talon_canvas
+    talon.cron = cron
+    talon.scripting = scripting
+    talon.Module = Module
+    talon.Context = Context
+    talon.actions = Actions()
+    talon.app = types.SimpleNamespace(register=ignore, notify=ignore, name="talon", platform="linux")
+    talon.ctrl = types.SimpleNamespace(mouse_pos=lambda: (0, 0), mouse_click=ignore)
+    talon.scope = types.SimpleNamespace(get=lambda name, default=None: default, register=ignore, unregister=ignore)
+    talon.settings = types.SimpleNamespace(get=lambda name, default=None: default, register=ignore, unregister=ignore)
+    talon.registry = types.SimpleNamespace(lists={}, commands={}, decls=types.SimpleNamespace(lists={}))
+    talon.fs = types.SimpleNamespace(watch=ignore, unwatch=ignore)
+    talon.speech_system = types.SimpleNamespace(register=ignore, unregister=ignore)
+    talon.clip = types.SimpleNamespace(text=lambda: "", set_text=ignore)
+    sys.modules.update({
+        "talon": talon,
+        "talon.skia": skia,
+        "talon.ui": ui,
+        "talon.types": talon_types,
+        "talon.types.point": talon_types_point,
+        "talon.canvas": talon_canvas,
+        "talon.cron": cron,
+        "talon.scripting": scripting,
+        "talon_init": talon_init
+    })
+    
+def import_hud_module(module_name: str):
+    """Imports a module of the HUD the same way Talon would, as part of the user.talon_hud package"""
+    install_talon_stubs()
+    if "user.talon_hud" not in sys.modules:
+        user_package = types.ModuleType("user")
+        user_package.__path__ = []
+        hud_package = types.ModuleType("user.talon_hud")
+        hud_package.__path__ = [hud_directory]
+        user_package.talon_hud = hud_package
+        sys.modules["user"] = user_package
+        sys.modules["user.talon_hud"] = hud_package
+    
+    return importlib.import_module("user.talon_hud." + module_name)
@@ -0,0 +1,151 @@
+from talon import actions, app, ui, Module
+from talon.types.point import Point2d
+from dataclasses import fields, is_dataclass
+from collections import deque
+from typing import Any
+from ..configuration import hud_get_configuration
+from . import typing as content_typing
+import json
+import os
+import time
+
+# Content event classes that can be restored from a recording, by their class name
+recordable_content_types = {name: value for name, value in vars(content_typing).items() if isinstance(value, type) and is_dataclass(value)}
+
+# Callbacks cannot be recorded, so replayed content gets a callback that does nothing instead
+def ignore_callback(*args):
+    pass
+
+# Collection types that are restored from a list of their items
+recordable_collection_types = {"tuple": tuple, "set": set, "deque": deque}
+
+# Convert content to a JSON compatible value, keeping the class names so the content can be restored
+# Values that cannot be restored are recorded as their text, counted by their type name in lossy_types if it is given
+def serialize_content(value: Any, lossy_types: dict = None) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    elif is_dataclass(value) and not isinstance(value, type):
+        serialized = {"__type__": type(value).__name__}
+        for field in fields(value):
+            serialized[field.name] = serialize_content(getattr(value, field.name), lossy_types)
+        return serialized
+    elif isinstance(value, ui.Rect):
+        return {"__type__": "Rect", "x": value.x, "y": value.y, "width": value.width, "height": value.height}
+    elif isinstance(value, Point2d):
+        return {"__type__": "Point2d", "x": value.x, "y": value.y}
+    elif isinstance(value, dict):
+        # Dictionaries are kept as key and value pairs, as JSON objects would turn every key into a string
+        return {"__type__": "dict", "items": [[serialize_content(key, lossy_types), serialize_content(item, lossy_types)] for key, item in value.items()]}
+    elif isinstance(value, list):
+        return [serialize_content(item, lossy_types) for item in value]
+    elif isinstance(value, tuple(recordable_collection_types.values())):
+        type_name = next(name for name, collection_type in recordable_collection_types.items() if isinstance(value, collection_type))
+        return {"__type__": type_name, "items": [serialize_content(item, lossy_types) for item in value]}
+    elif callable(value):
+        return {"__type__": "callable"}
+    else:
+        if lossy_types is not None:
+            lossy_types[type(value).__name__] = lossy_types.get(type(value).__name__, 0) + 1
+        return repr(value)
+
+def deserialize_content(value: Any) -> Any:
+    if isinstance(value, list):
+        return [deserialize_content(item) for item in value]
+    elif not isinstance(value, dict):
+        return value
+
+    value_type = value.get("__type__")
+    if value_type == "dict":
+        # Recordings made before the keys were kept as pairs store the items as an object with string keys
+        if isinstance(value["items"], dict):
+            return {key: deserialize_content(item) for key, item in value["items"].items()}
+        return {deserialize_content(key): deserialize_content(item) for key, item in value["items"]}
+    elif value_type in recordable_collection_types:
+        return recordable_collection_types[value_type](deserialize_content(item) for item in value["items"])
+    elif value_type == "callable":
+        return ignore_callback
+    elif value_type == "Rect":
+        return ui.Rect(value["x"], value["y"], value["width"], value["height"])
+    elif value_type == "Point2d":
+        return Point2d(value["x"], value["y"])
+    elif value_type in recordable_content_types:
+        return recordable_content_types[value_type](**{key: deserialize_content(item) for key, item in value.items() if key != "__type__"})
+    else:
+        return value
+
+# Read a recording as a list of the offsets in seconds since the start of the recording, and the recorded content events
+def read_recorded_events(path: str) -> list:
+    recorded_events = []
+    with open(path, "r", encoding="utf-8") as recording:
+        for line in recording:
+            if line.strip() != "":
+                recorded_line = json.loads(line)
+                recorded_events.append((recorded_line["t"], deserialize_content(recorded_line["e"])))
+    return recorded_events
+
+# Records the content events that are sent to the widgets, one JSON line per event
+# The recordings can be replayed using the benchmarks to compare real traffic between changes
+class HudEventRecorder:
+
+    recording = False
+    recording_file = None
+    path = ""
+    start_time = 0
+    event_count = 0
+    lossy_types = None # The amount of values that could only be recorded as text, by their type name
+
+    def start(self, path: str):
+        self.stop()
+        self.path = path
+        # Line buffered so every recorded event ends up on disk, even when Talon stops during a recording
+        self.recording_file = open(path, "w", encoding="utf-8", buffering=1)
+        self.start_time = time.perf_counter()
+        self.event_count = 0
+        self.lossy_types = {}
+        self.recording = True
+
+    def stop(self):
+        if self.recording:
+            self.recording = False
+            self.recording_file.close()
+            self.recording_file = None
+
+    # Called when this file is reloaded, so the file of the previous recorder is closed
+    def destroy(self):
+        self.stop()
+
+    def record(self, event: content_typing.HudContentEvent):
+        if self.recording:
+            offset = round(time.perf_counter() - self.start_time, 4)
+            self.recording_file.write(json.dumps({"t": offset, "e": serialize_content(event, self.lossy_types)}, separators=(",", ":")) + "\n")
+            self.event_count += 1
+
+event_recorder = HudEventRecorder()
+
+def on_ready():
+    global event_recorder
+    actions.user.hud_internal_register("HudEventRecorder", event_recorder)
+
+app.register("ready", on_ready)
+
+mod = Module()
+@mod.action_class
+class Actions:
+
+    def hud_start_event_recording(filename: str = ""):
+        """Start recording the content events sent to the HUD widgets to a file in the content preferences folder"""
+        global event_recorder
+        if filename == "":
+            filename = "event_recording_" + time.strftime("%Y%m%d_%H%M%S") + ".jsonl"
+        event_recorder.start(os.path.join(hud_get_configuration("content_preferences_folder"), filename))
+        actions.user.hud_add_log("event", "Recording HUD content events to " + event_recorder.path)
+
+    def hud_stop_event_recording():
+        """Stop recording the content events sent to the HUD widgets"""
+        global event_recorder
+        if event_recorder.recording:
+            event_recorder.stop()
+            actions.user.hud_add_log("event", "Recorded " + str(event_recorder.event_count) + " HUD content events to " + event_recorder.path)
+            if event_recorder.lossy_types:
+                actions.user.hud_add_log("warning", "Some values could not be recorded and will be replayed as text: " + 
+                    ", ".join(type_name + " (" + str(count) + ")" for type_name, count in event_recorder.lossy_types.items()))
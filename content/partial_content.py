@@ -1,5 +1,6 @@
 from .typing import HudContentEvent, CLAIM_WIDGET_TOPIC_TYPE, CLAIM_BROADCAST
 from typing import Any
+from collections import deque
 import copy
 
 
@@ -8,6 +9,7 @@ class HudPartialContent:
 
     topic_types = None
     persisted_topics = None
+    content_version = 0 # The version of the content state at the last received content dump
 	
     def __init__(self, topic_types = []):
         self.persisted_topics = []
@@ -24,7 +26,7 @@ class HudPartialContent:
         if topic_type in self.topic_types:
             for ordered_topic in self.persisted_topics:
                 if ordered_topic in self.topic_types[topic_type] and ( topic == None or topic == ordered_topic ):
-                    if isinstance(self.topic_types[topic_type][ordered_topic], list):
+                    if isinstance(self.topic_types[topic_type][ordered_topic], (list, deque)):
                         topic_contents.extend(self.topic_types[topic_type][ordered_topic])
                     else:
                         topic_contents.append(self.topic_types[topic_type][ordered_topic])
@@ -77,6 +79,7 @@ class HudPartialContent:
         elif event.operation == "remove":
             self.remove_topic(event.topic_type, event.topic)
         elif event.operation == "dump":
+            self.content_version = event.content["version"] if "version" in event.content else 0
             for topic_type in event.content["topic_types"]:
                 if topic_type not in self.topic_types:
                     continue
@@ -0,0 +1,67 @@
+from talon import actions, cron, app, Module
+from .poller import Poller
+from ..performance import performance_tracer
+
+# Traces the content pipeline and shows the slowest stages for debugging purposes
+class PerformancePoller(Poller):
+    content = None
+    job = None
+    previous_stats_text = ""
+    should_open = False
+    enabled = False
+    max_shown_keys = 5
+
+    def enable(self):
+        if not self.enabled:
+            self.enabled = True
+            self.should_open = True
+            performance_tracer.enable()
+            self.job = cron.interval("1000ms", self.state_check)
+
+    def disable(self):
+        if self.enabled:
+            cron.cancel(self.job)
+            self.job = None
+            self.enabled = False
+            self.previous_stats_text = ""
+            performance_tracer.disable()
+            self.content.publish_event("text", "performance", "remove")
+
+    def state_check(self):
+        stats_text = self.get_stats_in_text()
+        if (stats_text != self.previous_stats_text):
+            self.previous_stats_text = stats_text
+            panel_content = self.content.create_panel_content(stats_text, "performance", "Toolkit performance", self.should_open)
+            self.content.publish_event("text", panel_content.topic, "replace", panel_content, self.should_open)
+            self.should_open = False
+
+    def get_stats_in_text(self):
+        stats = performance_tracer.get_stats()
+        if len(stats) == 0:
+            return "No timings collected yet"
+
+        text = "Slowest per stage in ms, p95 - max ( count )"
+        for stage in ["dispatch", "broadcast_update", "content_handler", "layout_content", "draw", "publish_to_draw"]:
+            if stage in stats:
+                text += "\n<*" + stage + ":/>"
+                slowest_keys = sorted(stats[stage].keys(), key=lambda key: stats[stage][key]["p95_ms"], reverse=True)
+                for key in slowest_keys[:self.max_shown_keys]:
+                    key_stats = stats[stage][key]
+                    text += "\n" + key + ": " + "{:.2f}".format(key_stats["p95_ms"]) + " - " + "{:.2f}".format(key_stats["max_ms"]) + " ( " + str(key_stats["count"]) + " )"
+        return text
+
+def append_poller():
+    actions.user.hud_add_poller("performance", PerformancePoller())
+app.register("ready", append_poller)
+
+mod = Module()
+@mod.action_class
+class Actions:
+
+    def hud_toolkit_performance():
+        """Start tracing the performance of the Talon HUD content updates"""
+        actions.user.hud_activate_poller("performance")
+
+    def hud_get_performance_stats() -> dict:
+        """Get the timings of the Talon HUD content updates per stage, topic and widget, which are only collected while the performance toolkit is active"""
+        return performance_tracer.get_stats()
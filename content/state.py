@@ -1,12 +1,15 @@
-from talon import actions, Module, ui, app
+from talon import actions, Module, ui, app, cron
 from talon.types.point import Point2d
 from talon_init import TALON_USER
 from talon.scripting import Dispatch
-from .typing import HudPanelContent, HudButton, HudChoice, HudChoices, HudScreenRegion, HudAudioCue, HudDynamicVoiceCommand, HudLogMessage, HudContentEvent, HudAbilityIcon, HudStatusIcon, HudStatusOption
+from .typing import HudPanelContent, HudButton, HudChoice, HudChoices, HudScreenRegion, HudAudioCue, HudDynamicVoiceCommand, HudLogMessage, HudContentEvent, HudAbilityIcon, HudStatusIcon, HudStatusOption, \
+    PRIORITY_TOPIC_DEFAULT, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BACKGROUND
 from typing import Callable, Any, Union
+from ..performance import performance_tracer
 import time
 import os
 import copy
+from collections import deque
 
 max_log_length = 50
 mod = Module()
@@ -25,18 +28,55 @@ class HeadUpDisplayContent(Dispatch):
     save_up_events = True
     saved_events = None
     
+    # When batching is enabled, the broadcasted events within a single tick are coalesced per topic before being sent out
+    batch_events = False
+    batched_events = None
+    batch_job = None
+    
+    # Background events are delivered in later ticks, a few topics per tick, so events of user actions never wait behind them
+    # A topic that has been queued for longer than the maximum delay is delivered regardless of the amount of topics per tick
+    background_events = None
+    background_queued_at = None
+    background_job = None
+    background_topics_per_tick = 5
+    background_max_delay = 0.25
+    
+    # The priority of events that do not have a priority of their own, by topic type and topic or by topic type
+    topic_priorities = {
+        "choice": PRIORITY_INTERACTIVE,
+        "walkthrough_step": PRIORITY_INTERACTIVE,
+        ("variable", "mode"): PRIORITY_INTERACTIVE,
+        "status_icons": PRIORITY_BACKGROUND,
+        "status_options": PRIORITY_BACKGROUND,
+        ("text", "scope"): PRIORITY_BACKGROUND,
+        ("text", "speech"): PRIORITY_BACKGROUND,
+        ("text", "list"): PRIORITY_BACKGROUND,
+        ("text", "performance"): PRIORITY_BACKGROUND,
+    }
+    
+    # The maximum amount of log messages kept per log topic, topics not mentioned here keep max_log_length messages
+    log_capacities = {}
+    
+    # The content is versioned and copied on write, so snapshots of it can be shared without copying all the topics
+    # Every change increases the version, and the version of the last change is kept for every topic
+    version = 0
+    topic_versions = None
+    full_dump_version = 0 # Changes made before this version are not tracked, so older versions need all the content
+    snapshot_id = 0
+    owned_containers = None # The topic types and topics that were copied after the last snapshot, and can be changed in place
+    
     topic_types = {
         "variable": {
             "mode": "command"
         },
         "log_messages": {
-            "command": [],
-            "error": [],
-            "event": [],
-            "warning": [],
-            "success": [],
-            "phrase": [],
-            "announcer": []
+            "command": deque(maxlen=max_log_length),
+            "error": deque(maxlen=max_log_length),
+            "event": deque(maxlen=max_log_length),
+            "warning": deque(maxlen=max_log_length),
+            "success": deque(maxlen=max_log_length),
+            "phrase": deque(maxlen=max_log_length),
+            "announcer": deque(maxlen=max_log_length)
         },
         "walkthrough_step": {},
         "text": {},
@@ -50,30 +90,28 @@ class HeadUpDisplayContent(Dispatch):
 
     # Publish content meant for text boxes and other panels
     def publish(self, topic_type, panel_content: HudPanelContent):
-        if not topic_type in self.topic_types:
-            self.topic_types[topic_type] = {}
-        self.topic_types[topic_type][panel_content.topic] = panel_content
+        self.get_writable_topics(topic_type)[panel_content.topic] = panel_content
+        self.mark_topic_changed(topic_type, panel_content.topic)
         self.dispatch("broadcast_update", HudContentEvent(topic_type, panel_content.topic, panel_content, "replace", CLAIM_WIDGET_TOPIC_TYPE, panel_content.show ))
     
     # Publish content directly through the event system
-    def publish_event(self, topic_type, topic, data, operation, show = False, claim = 0):
+    def publish_event(self, topic_type, topic, data, operation, show = False, claim = 0, priority = PRIORITY_TOPIC_DEFAULT):
         if operation == "replace":
             self.update_topic_type(topic_type, topic, data, False)
         elif operation == "remove":
             self.clear_topic_type(topic_type, topic, False)
         
-        self.dispatch("broadcast_update", HudContentEvent(topic_type, topic, data, operation, claim, show))
+        self.dispatch("broadcast_update", HudContentEvent(topic_type, topic, data, operation, claim, show, priority))
 
     # Update a topic type if the content has changed
     def update_topic_type(self, topic_type, topic, data, send_event = True) -> bool:
         updated = False
         if topic_type in self.topic_types:
-            if not topic in self.topic_types[topic_type]:
-               self.topic_types[topic_type][topic] = None
-               
-            if self.topic_types[topic_type][topic] != data:
+            topics = self.get_writable_topics(topic_type)
+            if topics.get(topic) != data:
                updated = True
-            self.topic_types[topic_type][topic] = data
+               self.mark_topic_changed(topic_type, topic)
+            topics[topic] = data
             
             if updated and send_event:
                self.dispatch("broadcast_update", HudContentEvent(topic_type, topic, data, "replace"))
@@ -84,15 +122,16 @@ class HeadUpDisplayContent(Dispatch):
         updated = False    
     
         if topic_type in self.topic_types:
-            if topic not in self.topic_types[topic_type]:
-               self.topic_types[topic_type][topic] = []
+            topic_content = self.get_writable_topic(topic_type, topic, [])
             if isinstance(data, list) and len(data) > 0:
-               self.topic_types[topic_type][topic].extend(data)
+               topic_content.extend(data)
                updated = True
             else:
-               self.topic_types[topic_type][topic].append(data)
+               topic_content.append(data)
                updated = True
             
+            if updated:
+                self.mark_topic_changed(topic_type, topic)
             if updated and send_event:
                 self.dispatch("broadcast_update", HudContentEvent(topic_type, topic, self.topic_types[topic_type][topic], "replace"))
 		        
@@ -101,22 +140,84 @@ class HeadUpDisplayContent(Dispatch):
         removed = False
         if topic_type in self.topic_types:
             if topic in self.topic_types[topic_type]:
-               del self.topic_types[topic_type][topic]
+               del self.get_writable_topics(topic_type)[topic]
+               self.mark_topic_changed(topic_type, topic)
                removed = True
             if removed and send_event:
                 self.dispatch("broadcast_update", HudContentEvent(topic_type, topic, None, "remove"))
         return removed
 
+    # Mark a topic as changed so it will be sent along with content dumps of earlier versions
+    def mark_topic_changed(self, topic_type, topic):
+        if self.topic_versions is None:
+            self.topic_versions = {}
+        self.version += 1
+        self.topic_versions[(topic_type, topic)] = self.version
+
+    # Get the topics of a topic type that can be changed without altering earlier snapshots
+    def get_writable_topics(self, topic_type) -> dict:
+        if self.owned_containers is None:
+            self.owned_containers = {}
+        
+        if topic_type not in self.topic_types:
+            self.topic_types[topic_type] = {}
+        elif self.owned_containers.get(topic_type) != self.snapshot_id:
+            self.topic_types[topic_type] = dict(self.topic_types[topic_type])
+        self.owned_containers[topic_type] = self.snapshot_id
+        return self.topic_types[topic_type]
+
+    # Get the collection of a topic that can be changed without altering earlier snapshots
+    def get_writable_topic(self, topic_type, topic, default = None):
+        topics = self.get_writable_topics(topic_type)
+        key = (topic_type, topic)
+        if topic not in topics:
+            topics[topic] = default
+        elif self.owned_containers.get(key) != self.snapshot_id:
+            topic_content = topics[topic]
+            if isinstance(topic_content, deque):
+                topics[topic] = deque(topic_content, maxlen=topic_content.maxlen)
+            elif isinstance(topic_content, list):
+                topics[topic] = list(topic_content)
+        self.owned_containers[key] = self.snapshot_id
+        return topics[topic]
+
+    # Get a snapshot of all the content that will not be altered by later changes
+    def get_snapshot(self) -> dict:
+        # Every topic type and collection becomes shared, so they will be copied before they are changed again
+        self.snapshot_id += 1
+        return dict(self.topic_types)
+        
+    # Restore the content from a snapshot, for example one made by the content state before a reload
+    def restore_snapshot(self, topic_types: dict, version: int = 0):
+        self.snapshot_id += 1
+        self.topic_types = topic_types
+        self.topic_versions = {}
+        self.version = max(self.version, version) + 1
+        self.full_dump_version = self.version
+
+    # Get the ring buffer of log messages for a topic, where the oldest messages are evicted once it is full
+    def get_log_messages(self, topic) -> deque:
+        capacity = self.log_capacities[topic] if topic in self.log_capacities else max_log_length
+        log_messages = self.get_writable_topic("log_messages", topic, deque(maxlen=capacity))
+        
+        # Log messages kept before a reload might still be stored in a list or a buffer with a different capacity
+        if not isinstance(log_messages, deque) or log_messages.maxlen != capacity:
+            log_messages = deque(log_messages, maxlen=capacity)
+            self.topic_types["log_messages"][topic] = log_messages
+        return log_messages
+        
+    # Change the amount of log messages kept for a topic, discarding the oldest messages if there are too many
+    def set_log_capacity(self, topic, capacity: int):
+        self.log_capacities[topic] = max(1, capacity)
+        self.get_log_messages(topic)
+        self.mark_topic_changed("log_messages", topic)
+
     def append_to_log_messages(self, topic, log_message, timestamp = None, metadata = None):    
         log_message = HudLogMessage(timestamp if timestamp else time.monotonic(), topic, log_message, metadata)
-        if topic not in self.topic_types["log_messages"]:
-            self.topic_types["log_messages"][topic] = []
-        self.topic_types["log_messages"][topic].append(log_message)
-        self.topic_types["log_messages"][topic][-max_log_length:]
+        self.get_log_messages(topic).append(log_message)
+        self.mark_topic_changed("log_messages", topic)
         
-        if self.queued_log_splits:
-            self.revise_log(True)
-        else:
+        if not self.queued_log_splits or topic not in self.queued_log_splits or not self.revise_log(True, topic):
             self.dispatch("broadcast_update", HudContentEvent("log_messages", topic, log_message, "append"))
 
     def show_throttled_logs(self, sleep_s: float = 0):
@@ -125,68 +226,85 @@ class HeadUpDisplayContent(Dispatch):
         
         if self.throttled_logs:
             for log_message in self.throttled_logs:
-                self.topic_types["log_messages"][log_message.type].append(log_message)
-                self.topic_types["log_messages"][log_message.type][-max_log_length:]
-                if self.queued_log_splits:
-                    self.revise_log(True)
-                else:
+                self.get_log_messages(log_message.type).append(log_message)
+                self.mark_topic_changed("log_messages", log_message.type)
+                if not self.queued_log_splits or log_message.type not in self.queued_log_splits or not self.revise_log(True, log_message.type):
                     self.dispatch("broadcast_update", HudContentEvent("log_messages", log_message.type, log_message, "append"))
             self.throttled_logs = []
 
-    def revise_log(self, send_update = False):
+    # Split up the last log message of a log type using the queued splits of that type
+    # Only the last log message can be revised, so the queued splits are kept by log type to prevent going over unrelated splits
+    # Returns whether or not an update was sent out for the revised logs
+    def revise_log(self, send_update = False, type = "command") -> bool:
+        queued_logs = self.queued_log_splits[type] if type in self.queued_log_splits else []
+        log_messages = self.get_log_messages(type)
         revised_indecis = []
         updated_logs = []
-        for queue_index, queued_log in enumerate(self.queued_log_splits):
-            type = queued_log["type"]
+        for queue_index, queued_log in enumerate(queued_logs):
             prefix = queued_log["prefix"]
             discard_remaining = queued_log["discard_remaining"]
             throttled = queued_log["throttled"]
             
-            log_amount = len(self.topic_types["log_messages"][type])
+            log_amount = len(log_messages)
             if log_amount > 0:
                 
                 index = log_amount - 1
-                log = self.topic_types["log_messages"][type][index] if index != -1 and index < log_amount else None
+                log = log_messages[index]
                 
-                if index != -1 and log is not None and log.message.startswith(prefix):
+                if log.message.startswith(prefix):
                     revised_indecis.append( queue_index )
                     remaining = log.message[len(prefix):].lstrip()
                     if remaining:
-                        self.topic_types["log_messages"][type][index].message = prefix.strip()
+                        # Replace the revised log instead of changing it, as it can be part of an earlier snapshot
+                        log = copy.copy(log)
+                        log.message = prefix.strip()
+                        log_messages[index] = log
+                        self.mark_topic_changed("log_messages", type)
                                
-                        revised_logs = [self.topic_types["log_messages"][type][index]]
+                        revised_logs = [log]
                         if not discard_remaining:
                             remainder_log = HudLogMessage(log.time, type, remaining)
                             
                             if not throttled:
                                 revised_logs.append(remainder_log)
-                                if index >= log_amount or index == 1:
-                                    self.topic_types["log_messages"][type].append(remainder_log)
+                                if index == 1:
+                                    log_messages.append(remainder_log)
                                 else:
-                                    self.topic_types["log_messages"][type].insert(index, remainder_log)
+                                    # A full ring buffer cannot grow, so evict the oldest message before inserting
+                                    if log_amount == log_messages.maxlen:
+                                        log_messages.popleft()
+                                        index -= 1
+                                    log_messages.insert(index, remainder_log)
                             else:
                                 self.throttled_logs.append(remainder_log)
                         
                         if send_update == False:
                             event = HudContentEvent("log_messages", type, revised_logs, "patch")
                             self.dispatch("broadcast_update", event)
+                        else:
+                            updated_logs.extend(revised_logs)
     
         # Remove the queued splits from the log in reverse to preserve the order
         revised_indecis.reverse()
         for queue_index in revised_indecis:
-            self.queued_log_splits.pop(queue_index)
+            queued_logs.pop(queue_index)
+        if type in self.queued_log_splits and len(queued_logs) == 0:
+            del self.queued_log_splits[type]
         
         if send_update and len(updated_logs):
             self.dispatch("broadcast_update", HudContentEvent("log_messages", type, updated_logs, "patch"))
+        return len(updated_logs) > 0
     
     def edit_log_message(self, prefix, throttled = False, discard_remaining = False, type = "command"):
         if self.queued_log_splits is None:
-            self.queued_log_splits = []
+            self.queued_log_splits = {}
         if self.throttled_logs == None:
             self.throttled_logs = []
-        self.queued_log_splits.append({"type": type, "prefix": prefix, 
+        if type not in self.queued_log_splits:
+            self.queued_log_splits[type] = []
+        self.queued_log_splits[type].append({"prefix": prefix, 
             "discard_remaining": discard_remaining, "throttled": throttled})
-        self.revise_log()
+        self.revise_log(False, type)
         
     def save_events(self):
         self.save_up_events = True
@@ -200,19 +318,160 @@ class HeadUpDisplayContent(Dispatch):
             self.dispatch(event["type"], event["event"])
 
     def dispatch(self, type: str, event: HudContentEvent):
+        trace_start = performance_tracer.start()
+        performance_tracer.mark_published(event.topic_type, event.topic)
         if self.save_up_events:
             if self.saved_events == None:
                 self.saved_events = []
             self.saved_events.append({"type": type, "event": event})
+        elif type == "broadcast_update" and event.operation != "dump":
+            self.schedule_event(event)
         else:
             super().dispatch(type, event)
+        performance_tracer.record("dispatch", event.topic_type + "/" + str(event.topic), trace_start)
+
+    def get_event_priority(self, event: HudContentEvent) -> int:
+        if event.priority != PRIORITY_TOPIC_DEFAULT:
+            return event.priority
+        elif (event.topic_type, event.topic) in self.topic_priorities:
+            return self.topic_priorities[(event.topic_type, event.topic)]
+        else:
+            return self.topic_priorities.get(event.topic_type, PRIORITY_NORMAL)
+
+    def set_topic_priority(self, topic_type, topic, priority: int):
+        key = topic_type if topic is None or topic == "" else (topic_type, topic)
+        if priority == PRIORITY_TOPIC_DEFAULT:
+            if key in self.topic_priorities:
+                del self.topic_priorities[key]
+        else:
+            self.topic_priorities[key] = priority
+
+    # Send out interactive and normal events right away, or with the batch, and delay background events
+    # The events of a single topic are always sent out in the order they were published
+    def schedule_event(self, event: HudContentEvent):
+        key = (event.topic_type, event.topic)
+        priority = self.get_event_priority(event)
+        if priority != PRIORITY_BACKGROUND and self.background_events and key in self.background_events:
+            self.flush_background_topic(key)
+    
+        if priority == PRIORITY_BACKGROUND and not (self.batched_events and key in self.batched_events):
+            self.queue_background_event(event)
+        elif self.batch_events:
+            self.batch_event(event)
+        else:
+            super().dispatch("broadcast_update", event)
+
+    def set_batch_events(self, batch_events: bool):
+        self.batch_events = batch_events
+        if not batch_events:
+            self.flush_batched_events()
+
+    def batch_event(self, event: HudContentEvent):
+        if self.batched_events is None:
+            self.batched_events = {}
+        self.coalesce_event(self.batched_events, event)
+        
+        if self.batch_job is None:
+            self.batch_job = cron.after("16ms", self.flush_batched_events)
+
+    # Coalesce an event with the other events of its topic that have not been sent out yet
+    # Replacements and removals supersede all earlier events of a topic, while appends are merged into a single event
+    def coalesce_event(self, queued_events: dict, event: HudContentEvent):
+        key = (event.topic_type, event.topic)
+        topic_events = queued_events[key] if key in queued_events else []
+        if event.operation in ["replace", "remove"]:
+            # Make sure superseded events can still claim a widget and show the content
+            show = event.show or any(topic_event.show for topic_event in topic_events)
+            claim = max([event.claim] + [topic_event.claim for topic_event in topic_events])
+            if event.show != show or event.claim != claim:
+                event = HudContentEvent(event.topic_type, event.topic, event.content, event.operation, claim, show, event.priority)
+            
+            # Move the topic to the end to keep the order in which the events were published
+            if key in queued_events:
+                del queued_events[key]
+            topic_events = [event]
+        elif event.operation == "append" and len(topic_events) > 0 and topic_events[-1].operation == "append":
+            previous_event = topic_events[-1]
+            content = previous_event.content if isinstance(previous_event.content, list) else [previous_event.content]
+            topic_events[-1] = HudContentEvent(event.topic_type, event.topic, content + [event.content], "append", 
+                max(previous_event.claim, event.claim), previous_event.show or event.show, previous_event.priority)
+        else:
+            topic_events.append(event)
+        queued_events[key] = topic_events
+    
+    def flush_batched_events(self):
+        if self.batch_job is not None:
+            cron.cancel(self.batch_job)
+            self.batch_job = None
+        
+        batched_events = self.batched_events
+        self.batched_events = None
+        if batched_events:
+            # Interactive topics go first, the sort keeps the publishing order of topics with the same priority
+            for topic_events in sorted(batched_events.values(), key=lambda topic_events: self.get_event_priority(topic_events[0])):
+                for event in topic_events:
+                    super().dispatch("broadcast_update", event)
+
+    def queue_background_event(self, event: HudContentEvent):
+        if self.background_events is None:
+            self.background_events = {}
+            self.background_queued_at = {}
+        
+        key = (event.topic_type, event.topic)
+        if key not in self.background_queued_at:
+            self.background_queued_at[key] = time.monotonic()
+        self.coalesce_event(self.background_events, event)
         
-    # Get a full content dump to be used in refreshing widgets after a code update
-    def get_content_dump(self) -> HudContentEvent:
-        return HudContentEvent("content_dump", "", {"topic_types": copy.copy(self.topic_types)}, "dump")
+        if self.background_job is None:
+            self.background_job = cron.after("16ms", self.flush_background_events)
+
+    def flush_background_topic(self, key):
+        topic_events = self.background_events.pop(key)
+        del self.background_queued_at[key]
+        for event in topic_events:
+            super().dispatch("broadcast_update", event)
+
+    # Send out the topics that have been queued the longest, and every topic that has waited too long
+    def flush_background_events(self):
+        if self.background_job is not None:
+            cron.cancel(self.background_job)
+            self.background_job = None
+        
+        if self.background_events:
+            now = time.monotonic()
+            flushed_topics = 0
+            for key in list(self.background_events.keys()):
+                if flushed_topics < self.background_topics_per_tick or \
+                    now - self.background_queued_at[key] >= self.background_max_delay:
+                    self.flush_background_topic(key)
+                    flushed_topics += 1
+            
+            if self.background_events:
+                self.background_job = cron.after("16ms", self.flush_background_events)
+        
+    # Get a content dump to be used in refreshing widgets after a code update
+    # When a version is given, only the topics that have changed after that version are added
+    def get_content_dump(self, since_version: int = 0) -> HudContentEvent:
+        topic_types = self.get_snapshot()
+        if since_version > 0 and since_version >= self.full_dump_version:
+            changed_topic_types = {}
+            if self.topic_versions:
+                for (topic_type, topic), version in self.topic_versions.items():
+                    if version > since_version and topic_type in topic_types and topic in topic_types[topic_type]:
+                        if topic_type not in changed_topic_types:
+                            changed_topic_types[topic_type] = {}
+                        changed_topic_types[topic_type][topic] = topic_types[topic_type][topic]
+            topic_types = changed_topic_types
+        
+        return HudContentEvent("content_dump", "", {"topic_types": topic_types, "version": self.version}, "dump")
 
     def destroy(self):
-        pass
+        if self.batch_job is not None:
+            cron.cancel(self.batch_job)
+            self.batch_job = None
+        if self.background_job is not None:
+            cron.cancel(self.background_job)
+            self.background_job = None
 
 hud_content = HeadUpDisplayContent()
 
@@ -239,6 +498,21 @@ class Actions:
         """Sends the throttled log messages to be visualized after the optional sleep timeout"""
         global hud_content
         hud_content.show_throttled_logs(sleep_s)
+        
+    def hud_set_log_capacity(type: str, capacity: int):
+        """Sets the maximum amount of log messages kept for a log type, the oldest messages are discarded first"""
+        global hud_content
+        hud_content.set_log_capacity(type, capacity)
+
+    def hud_batch_content_events(enabled: int = 1):
+        """Coalesces the content events published within a single tick per topic before sending them to the widgets"""
+        global hud_content
+        hud_content.set_batch_events(enabled > 0)
+
+    def hud_set_topic_priority(topic_type: str, topic: str = "", priority: int = 1):
+        """Sets the priority of the content events of a topic type, or of a single topic, where 0 is interactive, 1 is normal, 2 is background and -1 resets it"""
+        global hud_content
+        hud_content.set_topic_priority(topic_type, topic, priority)
 
     def hud_add_status_icon(id: str, image: str):
         """Add an unclickable icon to the status bar"""
@@ -14,6 +14,9 @@ def pick_toolkit_option(data):
     elif data["text"] == "Lists":
         actions.user.hud_toolkit_lists()
         return True
+    elif data["text"] == "Performance":
+        actions.user.hud_toolkit_performance()
+        return False
     elif data["text"] == "Microphone selection":
         actions.user.show_microphone_options()
         return True
@@ -46,6 +49,7 @@ class Actions:
             {"text": "Scope"},
             {"text": "Lists"},
             {"text": "Speech"},
+            {"text": "Performance"},
             {"text": "Dismiss toolkit"}
         ], pick_toolkit_option)
         actions.user.hud_publish_choices(choices, "Toolkit debugging", "Pick content from the HUD Toolkit below")
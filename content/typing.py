@@ -14,6 +14,27 @@ class HudRichText:
 
 class HudRichTextLine: list[HudRichText]
 
+RICH_TEXT_TOKEN_TEXT = "text" # A run of text without any styling or line breaks in it
+RICH_TEXT_TOKEN_STYLE_START = "style_start" # Pushes a style onto the style stack, the value is the name of the style
+RICH_TEXT_TOKEN_STYLE_END = "style_end" # Pops the last added style from the style stack
+RICH_TEXT_TOKEN_LINE_BREAK = "line_break" # Ends the current line, the value contains the line break characters
+
+@dataclass(frozen=True)
+class HudRichTextToken:
+    type: str
+    value: str
+
+@dataclass
+class HudRichTextLayout:
+    text: str
+    width: int
+    font_key: tuple
+    lines: list[str]
+    line_states: list[tuple] # The styles and emboldening at the start of every line, and at the end of the text
+    line_indices: list[int] # The index of the first rich text of every line, and the amount of rich text at the end
+    rich_text: list[HudRichText]
+    changed_index: int = 0 # The index of the first rich text that could differ from the previous layout
+
 @dataclass
 class HudChoice:
     image: str
@@ -115,13 +136,18 @@ CONTENT_EVENT_OPERATION_REMOVE = "remove" # Used to signal a topic is being clea
 CONTENT_EVENT_OPERATION_DUMP = "dump" # Used to signal a complete replacement all the topics in a widget
 
 # These content events require manual handling from the widgets themselves
-CONTENT_EVENT_OPERATION_APPEND = "append" # Used to signal a single item being appended to a collection
+CONTENT_EVENT_OPERATION_APPEND = "append" # Used to signal a single item being appended to a collection, or a list of items when events are batched
 CONTENT_EVENT_OPERATION_PATCH = "patch" # Used to signal a partial replacement of the given topic
 
 CLAIM_BROADCAST = 0 # Broadcast to any widget that listens for this topic type
 CLAIM_WIDGET = 1 # Claim a single widget and send the content towards it
 CLAIM_WIDGET_TOPIC_TYPE = 2 # Claim a single widget and clear out the topic type attached to it
 
+PRIORITY_TOPIC_DEFAULT = -1 # Use the priority configured for the topic type and topic of the event
+PRIORITY_INTERACTIVE = 0 # Results of user actions like choices, walkthrough steps and mode changes, delivered before anything else
+PRIORITY_NORMAL = 1 # Regular content, delivered right away
+PRIORITY_BACKGROUND = 2 # Debug and status content from pollers, which can be delivered a few ticks later
+
 @dataclass
 class HudContentEvent:
     topic_type: str
@@ -130,6 +156,7 @@ class HudContentEvent:
     operation: str = "replace"
     claim: int = CLAIM_BROADCAST
     show: bool = False
+    priority: int = PRIORITY_TOPIC_DEFAULT
     
 @dataclass
 class HudLogMessage:
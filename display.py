@@ -2,11 +2,10 @@ from talon import Context, Module, actions, app, skia, cron, ctrl, scope, canvas
 from talon.types.point import Point2d
 import os
 import time
-import numpy
 
 from typing import Any, Union
 from .preferences import HeadUpDisplayUserPreferences
-from .theme import HeadUpDisplayTheme
+from .theme import HeadUpDisplayTheme, HeadUpThemeRegistry
 from .event_dispatch import HeadUpEventDispatch
 from .widget_manager import HeadUpWidgetManager
 from .content.content_builder import HudContentBuilder
@@ -16,7 +15,9 @@ from .widgets.choicepanel import HeadUpChoicePanel
 from .widgets.contextmenu import HeadUpContextMenu
 from .content.typing import HudPanelContent, HudButton, HudContentEvent, HudContentPage
 from .content.poller import Poller
-from .utils import string_to_speakable_string
+from .utils import string_to_speakable_string, strings_to_speakable_strings
+from .performance import performance_tracer
+from .geometry import has_moved
 
 
 # Taken from knausj/code/numbers to make Talon HUD standalone
@@ -76,18 +77,24 @@ def scope():
 class HeadUpDisplay:
     enabled = False
     display_state = None
+    event_recorder = None
     preferences = None
     theme = None
     event_dispatch = None
     pollers = []
     keep_alive_pollers = [] # These pollers will only deactivate when the hud deactivates    
-    custom_themes = {}
+    theme_registry = None
     disable_poller_job = None
     show_animations = False
     choices_visible = False
     allowed_content_operations = ["*"]
     allow_update_context = True
     current_flow = ""
+    content_routes = None # The widgets that receive the content events of a topic type and topic
+    widget_topic_references = None # The topics that every enabled widget has attached to it
+    context_lists = None # The contents of the context lists as they were last assigned
+    widget_context_entries = None # The entries every widget adds to the context lists, along with the widget state they were determined from
+    topic_reference_counts = None # The amount of enabled widgets that have a topic attached to them
     
     prev_mouse_pos = None
     mouse_poller = None
@@ -106,6 +113,7 @@ class HeadUpDisplay:
         self.pollers = {}
         self.keep_alive_pollers = []
         self.disable_poller_job = None
+        self.theme_registry = HeadUpThemeRegistry()
         self.theme = HeadUpDisplayTheme(self.preferences.prefs["theme_name"])
         self.event_dispatch = HeadUpEventDispatch()
         self.show_animations = self.preferences.prefs["show_animations"]
@@ -113,6 +121,7 @@ class HeadUpDisplay:
 
     def start(self, current_flow="initialize"):
         self.set_current_flow(current_flow)
+        self.theme_registry.watch()
         self.current_talon_hud_environment = settings.get("user.talon_hud_environment", "")
         if (self.preferences.prefs["enabled"]):
             self.enable()
@@ -143,6 +152,8 @@ class HeadUpDisplay:
             self.event_dispatch.register("deactivate_poller", self.deactivate_poller)
             self.event_dispatch.register("show_context_menu", self.move_context_menu)
             self.event_dispatch.register("synchronize_poller", self.synchronize_widget_poller)
+            self.event_dispatch.register("invalidate_content_routes", self.invalidate_content_routes)
+            self.invalidate_content_routes()
 
             # Reload the preferences just in case a screen change happened in between the hidden state
             if persisted or self.current_flow in ["repair", "initialize"]:
@@ -182,6 +193,7 @@ class HeadUpDisplay:
             self.event_dispatch.unregister("deactivate_poller", self.deactivate_poller)
             self.event_dispatch.unregister("show_context_menu", self.move_context_menu)
             self.event_dispatch.unregister("synchronize_poller", self.synchronize_widget_poller)
+            self.event_dispatch.unregister("invalidate_content_routes", self.invalidate_content_routes)
             
             self.disable_poller_job = cron.interval("30ms", self.disable_poller_check)
             self.display_state.unregister("broadcast_update", self.broadcast_update)
@@ -209,6 +221,10 @@ class HeadUpDisplay:
         self.preferences.persist_preferences(dict)
         self.determine_active_setup_mouse()
         
+        # Widget preference changes can come from anywhere, so make sure the pollers are in sync with all the widgets again
+        if self.enabled and self.current_flow not in ["repair", "initialize", "environment_changed"]:
+            self.synchronize_pollers()
+        
     # Debounce the widget preference persistence to make sure we do not get a ton of persisting operations
     def debounce_widget_preferences(self, _ = None):
         cron.cancel(self.update_preferences_debouncer)
@@ -222,9 +238,7 @@ class HeadUpDisplay:
         for widget in self.widget_manager.widgets:
             if not widget.enabled and widget.id == id:
                 widget.enable(True)                
-                for topic, poller in self.pollers.items():
-                    if topic in widget.current_topics and (not hasattr(self.pollers[topic], "enabled") or not self.pollers[topic].enabled):
-                        self.pollers[topic].enable()
+                self.synchronize_widget_poller(widget.id)
 
                 self.update_context()
                 break
@@ -241,12 +255,22 @@ class HeadUpDisplay:
         self.determine_active_setup_mouse()
         self.set_current_flow("manual")        
         
+    def toggle_id(self, id):
+        for widget in self.widget_manager.widgets:
+            if widget.id == id:
+                if widget.enabled:
+                    self.disable_id(id)
+                else:
+                    self.enable_id(id)
+                break
+
     def subscribe_content_id(self, id, content_key):
         self.set_current_flow("content_changed")    
         for widget in self.widget_manager.widgets:
             if widget.id == id:
                 if content_key not in widget.subscriptions:
                     widget.subscriptions.append(content_key)
+        self.invalidate_content_routes()
         self.set_current_flow("manual")
 
     def unsubscribe_content_id(self, id, content_key):
@@ -255,6 +279,7 @@ class HeadUpDisplay:
             if widget.id == id:
                 if content_key in widget.subscriptions:
                     widget.subscriptions.remove(content_key)
+        self.invalidate_content_routes()
         self.set_current_flow("manual")
 
     def set_widget_preference(self, id, property, value, persisted=False):
@@ -267,7 +292,7 @@ class HeadUpDisplay:
 
     def add_theme(self, theme_name, theme_dir):
         if os.path.exists(theme_dir):
-            self.custom_themes[theme_name] = theme_dir
+            self.theme_registry.add_theme(theme_name, theme_dir)
         else:
             app.notify("Invalid directory for '" + theme_name + "': " + theme_dir)
     
@@ -294,7 +319,10 @@ class HeadUpDisplay:
         if flow == "repair":
             self.synchronize_pollers(True, False)
         elif self.current_flow == "repair":
-            self.synchronize_pollers(False, True)            
+            self.synchronize_pollers(False, True)
+        # Pollers are not kept in sync with the widgets during these flows, so synchronize them all at the end
+        elif self.current_flow in ["initialize", "environment_changed"] and flow != self.current_flow and self.enabled:
+            self.synchronize_pollers()
 
         self.current_flow = flow
 
@@ -307,7 +335,7 @@ class HeadUpDisplay:
             if should_reset_watch:
                 self.unwatch_directories()
             
-            theme_dir = self.custom_themes[theme_name] if theme_name in self.custom_themes else None
+            theme_dir = self.theme_registry.get_theme_dir(theme_name)
             self.theme = HeadUpDisplayTheme(theme_name, theme_dir)
             for widget in self.widget_manager.widgets:
                 if disable_animation:
@@ -385,15 +413,21 @@ class HeadUpDisplay:
                     self.pollers[topic].content = HudContentBuilder(self.display_state)
                     if poller_enabled:
                         self.pollers[topic].enable()
+        elif type == "HudEventRecorder":
+            self.event_recorder = data
 
     def distribute_content(self):
         """Distributes the content from the content types to the different widgets"""
         self.allow_update_context = False
         self.display_state.save_events()
 
-        content_dump = self.display_state.get_content_dump()
+        # Only send the content that has changed since the last content dump that a widget has received
+        content_dumps = {}
         for widget in self.widget_manager.widgets:
-            widget.content_handler(content_dump)
+            content_version = widget.content.content_version
+            if content_version not in content_dumps:
+                content_dumps[content_version] = self.display_state.get_content_dump(content_version)
+            widget.content_handler(content_dumps[content_version])
 
         self.update_context()
         self.allow_update_context = True
@@ -438,39 +472,67 @@ class HeadUpDisplay:
             (not hasattr(self.pollers[topic], "enabled") or not self.pollers[topic].enabled):
             self.pollers[topic].enable()
 
+    # Synchronize all the pollers with the topics attached to the enabled widgets
     def synchronize_pollers(self, disable_pollers = True, enable_pollers = True):
-        attached_topics = list(self.keep_alive_pollers)
-        if self.enabled:
-            for widget in self.widget_manager.widgets:
-                if widget.current_topics and widget.enabled:
-                    attached_topics.extend(widget.current_topics)
+        self.widget_topic_references = {}
+        self.topic_reference_counts = {}
+        for widget in self.widget_manager.widgets:
+            self.update_topic_references(widget)
+        
+        self.synchronize_topic_pollers(list(self.pollers.keys()), disable_pollers, enable_pollers)
 
+    # Synchronize only the pollers of the given topics with the topics attached to the enabled widgets
+    def synchronize_topic_pollers(self, topics, disable_pollers = True, enable_pollers = True):
         # First - Disable all pollers from making content updates to prevent race conditions with content events from occurring
         if disable_pollers:
-            for topic, poller in self.pollers.items():
-                if topic not in attached_topics and (hasattr(self.pollers[topic], "enabled") and self.pollers[topic].enabled):
+            for topic in topics:
+                if topic in self.pollers and not self.is_topic_attached(topic) and (hasattr(self.pollers[topic], "enabled") and self.pollers[topic].enabled):
                     self.pollers[topic].disable()
 
         # Then - Automatically start pollers that are connected to widgets
         if enable_pollers:
-            for topic, poller in self.pollers.items():
-                if topic in attached_topics and (not hasattr(self.pollers[topic], "enabled") or not self.pollers[topic].enabled):
+            for topic in topics:
+                if topic in self.pollers and self.is_topic_attached(topic) and (not hasattr(self.pollers[topic], "enabled") or not self.pollers[topic].enabled):
                     self.pollers[topic].enable()
 
+    def is_topic_attached(self, topic) -> bool:
+        return topic in self.keep_alive_pollers or ( self.topic_reference_counts is not None and topic in self.topic_reference_counts )
+
+    # Update the reference counts of the topics attached to a widget
+    # Returns the topics that became attached or detached because of it
+    def update_topic_references(self, widget) -> list[str]:
+        if self.widget_topic_references is None:
+            self.widget_topic_references = {}
+            self.topic_reference_counts = {}
+    
+        topics = set(widget.current_topics) if self.enabled and widget.enabled and widget.current_topics else set()
+        previous_topics = self.widget_topic_references[widget.id] if widget.id in self.widget_topic_references else set()
+        if topics == previous_topics:
+            return []
+        
+        changed_topics = []
+        for topic in previous_topics - topics:
+            self.topic_reference_counts[topic] -= 1
+            if self.topic_reference_counts[topic] <= 0:
+                del self.topic_reference_counts[topic]
+                changed_topics.append(topic)
+        
+        for topic in topics - previous_topics:
+            if topic not in self.topic_reference_counts:
+                self.topic_reference_counts[topic] = 0
+                changed_topics.append(topic)
+            self.topic_reference_counts[topic] += 1
+        
+        self.widget_topic_references[widget.id] = topics
+        return changed_topics
+
     # Synchronize the pollers attached to a single widget
     def synchronize_widget_poller(self, widget_id):
-        current_topics = []
         for widget in self.widget_manager.widgets:
             if widget.id == widget_id:
-                current_topics = widget.current_topics
+                changed_topics = self.update_topic_references(widget)
+                self.synchronize_topic_pollers(set(widget.current_topics + changed_topics))
                 break
-
-        for topic in current_topics:
-            if topic in self.pollers and topic not in self.keep_alive_pollers:
-                if widget.enabled and (not hasattr(self.pollers[topic], "enabled") or not self.pollers[topic].enabled):
-                    self.pollers[topic].enable()
-                elif not widget.enabled and (hasattr(self.pollers[topic], "enabled") and self.pollers[topic].enabled):
-                    self.pollers[topic].disable()
                     
 
     # Check if the widgets are finished unloading, then disable the poller
@@ -489,6 +551,10 @@ class HeadUpDisplay:
             self.disable_poller_job = None
 
     def broadcast_update(self, event: HudContentEvent):
+        trace_start = performance_tracer.start()
+        if self.event_recorder:
+            self.event_recorder.record(event)
+        
         # Do not force a reopen of Talon HUD without explicit user permission        
         updated = False
         if not self.enabled:
@@ -498,54 +564,80 @@ class HeadUpDisplay:
         if "*" not in self.allowed_content_operations and event.operation not in self.allowed_content_operations:
             return
         
+        content_route = self.get_content_route(event.topic_type, event.topic)
+        handled_widgets = []
+        
         # Claim a widget and unregister its pollers
         if event.claim > 0:
-            topic = event.topic
-            using_fallback = True
-            widget_to_claim = None
-            widgets_with_topic = []
-            for widget in self.widget_manager.widgets:
-                if event.topic_type in widget.topic_types and topic in widget.current_topics:
-                    widgets_with_topic.append(widget)
-                
-                if event.topic_type in widget.topic_types and ( topic in widget.subscriptions or ("*" in widget.subscriptions and using_fallback)):
-                    if topic in widget.current_topics:
-                        widget_to_claim = widget
-                    else:
-                        widget_to_claim = widget
-                        if topic in widget.subscriptions:
-                            using_fallback = False
-
+            widget_to_claim = content_route["claim"]
             if widget_to_claim:
+                handled_widgets = content_route["with_topic"] + [widget_to_claim]
                 # When a new topic is published it can lay claim to a widget
                 # So old pollers need to be deregistered in that case
-                for widget in widgets_with_topic:
+                for widget in content_route["with_topic"]:
                     if widget.id != widget_to_claim.id:
                         widget.clear_topic(event.topic)
                 
                 updated = widget_to_claim.content_handler(event)
         else:
-            for widget in self.widget_manager.widgets:
-                if event.topic_type == "variable" or (event.topic_type in widget.topic_types and \
-                    (event.topic in widget.subscriptions or \
-                    ("*" in widget.subscriptions and "!" + event.topic not in widget.subscriptions))):
-
-                    current_enabled_state = widget.enabled
-                    updated = widget.content_handler(event)
-                    if widget.enabled != current_enabled_state:
-                        if event.topic in self.pollers and event.topic not in self.keep_alive_pollers:
-                            if widget.enabled:
-                                self.pollers[event.topic].enable()
-                            else:
-                                self.pollers[event.topic].disable()
+            handled_widgets = content_route["broadcast"]
+            for widget in content_route["broadcast"]:
+                current_enabled_state = widget.enabled
+                updated = widget.content_handler(event)
+                if widget.enabled != current_enabled_state:
+                    if event.topic in self.pollers and event.topic not in self.keep_alive_pollers:
+                        if widget.enabled:
+                            self.pollers[event.topic].enable()
+                        else:
+                            self.pollers[event.topic].disable()
 
         # For certain flows that trigger a lot of events we do not allow the pollers to be updated
         # As it can lead to faulty state
+        # Only the pollers of topics that were attached to or detached from the handled widgets need to be synchronized
         if self.current_flow not in ["repair", "initialize", "environment_changed"]:
-            self.synchronize_pollers()
+            changed_topics = set([event.topic])
+            for widget in handled_widgets:
+                changed_topics.update(self.update_topic_references(widget))
+            self.synchronize_topic_pollers(changed_topics)
 
         if updated and self.allow_update_context:
             self.update_context()
+        performance_tracer.record("broadcast_update", event.topic_type + "/" + str(event.topic), trace_start)
+
+    # Determine which widgets receive the content events of a topic
+    # The routes are kept until the subscriptions or the current topics of a widget change
+    def get_content_route(self, topic_type, topic) -> dict:
+        if self.content_routes is None:
+            self.content_routes = {}
+        
+        key = (topic_type, topic)
+        if key not in self.content_routes:
+            using_fallback = True
+            content_route = {
+                "broadcast": [], # The widgets that receive the events that do not claim a widget
+                "claim": None, # The widget that is claimed by events that claim a widget
+                "with_topic": [] # The widgets that currently show the topic, which lose it when another widget is claimed
+            }
+            
+            for widget in self.widget_manager.widgets:
+                if topic_type in widget.topic_types and topic in widget.current_topics:
+                    content_route["with_topic"].append(widget)
+                
+                if topic_type in widget.topic_types and ( topic in widget.subscriptions or ("*" in widget.subscriptions and using_fallback)):
+                    content_route["claim"] = widget
+                    if topic not in widget.current_topics and topic in widget.subscriptions:
+                        using_fallback = False
+                
+                if topic_type == "variable" or (topic_type in widget.topic_types and \
+                    (topic in widget.subscriptions or \
+                    ("*" in widget.subscriptions and "!" + topic not in widget.subscriptions))):
+                    content_route["broadcast"].append(widget)
+            self.content_routes[key] = content_route
+        
+        return self.content_routes[key]
+    
+    def invalidate_content_routes(self, _ = None):
+        self.content_routes = None
 
     # Determine whether or not we need to have a global mouse poller
     # This poller is needed for setup modes as not all canvases block the mouse
@@ -566,7 +658,7 @@ class HeadUpDisplay:
     def poll_mouse_pos_for_setup(self):
         pos = ctrl.mouse_pos()
         
-        if (self.prev_mouse_pos is None or numpy.linalg.norm(numpy.array(pos) - numpy.array(self.prev_mouse_pos)) > 1):
+        if has_moved(pos, self.prev_mouse_pos, 1):
             self.prev_mouse_pos = pos
             for widget in self.widget_manager.widgets:
                 if widget.enabled and widget.setup_type != "":
@@ -660,73 +752,112 @@ class HeadUpDisplay:
         choices = {}
         quick_choices = {}
         numerical_choices = {}
-        themes = {}
         enabled_voice_commands = {}
         
-        themes_directory = os.path.dirname(os.path.abspath(__file__)) + "/themes"
-        themes_list = os.listdir(themes_directory)
-        for theme in themes_list:
-            if theme != "_base_theme":
-                themes[string_to_speakable_string(theme)] = theme
-        for custom_theme_name in self.custom_themes:
-            themes[string_to_speakable_string(custom_theme_name)] = custom_theme_name
-        
         for widget in self.widget_manager.widgets:
-            current_widget_names = [string_to_speakable_string(widget.id)]        
-            if isinstance(widget, HeadUpTextPanel):
-                content_title = string_to_speakable_string(widget.panel_content.title)
-                if content_title:
-                    current_widget_names.append(string_to_speakable_string(widget.panel_content.title))
-                    
-            for widget_name in current_widget_names:
-                widget_names[widget_name] = widget.id
-                
-            # Add quick choices
-            for index, button in enumerate(widget.buttons):
-                choice_title = string_to_speakable_string(button.text)
-                if choice_title:
-                    for widget_name in current_widget_names:
-                        quick_choices[widget_name + " " + choice_title] = widget.id + "|" + str(index)
-            
-            # Add context choices
-            if widget.enabled and isinstance(widget, HeadUpContextMenu):
-                for index, button in enumerate(widget.buttons):
-                    choice_title = string_to_speakable_string(button.text)
-                    if choice_title:
-                        choices[choice_title] = widget.id + "|" + str(index)
-
-            # Add extra voice commands ( for instance, ones alluded to in text )
-            if widget.enabled and isinstance(widget, HeadUpTextPanel) and widget.panel_content.voice_commands:
-                for index, voice_command in enumerate(widget.panel_content.voice_commands):
-                    enabled_voice_command = string_to_speakable_string(voice_command.command)
-                    if enabled_voice_command:
-                        enabled_voice_commands[enabled_voice_command] = voice_command.callback
-             
-            # Add choice panel choices
+            context_entries = self.get_widget_context_entries(widget)
+            widget_names.update(context_entries["widget_names"])
+            quick_choices.update(context_entries["quick_choices"])
+            choices.update(context_entries["choices"])
+            numerical_choices.update(context_entries["numerical_choices"])
+            enabled_voice_commands.update(context_entries["enabled_voice_commands"])
             if widget.enabled and isinstance(widget, HeadUpChoicePanel):
                 self.choices_visible = True
-                for index, choice in enumerate(widget.choices):
-                    choice_title = string_to_speakable_string(choice.text)
-                    if choice_title:
-                        choices[choice_title] = widget.id + "|" + str(index)
-                    numerical_choices[numerical_choice_strings[index]] = widget.id + "|" + str(index)
-                        
-                if widget.panel_content.choices and widget.panel_content.choices.multiple:
-                    choices["confirm"] = widget.id + "|" + str(index + 1)
         
         # Make sure the list is never empty to prevent Talon issue #495
         # This workaround will be removed when the current beta is merged with the regular version
         if len(choices) == 0:
             choices["head up choice empty command"] = "|"
         
-        ctx.lists["user.talon_hud_numerical_choices"] = numerical_choices
-        ctx.lists["user.talon_hud_widget_names"] = widget_names
-        ctx.lists["user.talon_hud_choices"] = choices
-        ctx.lists["user.talon_hud_quick_choices"] = quick_choices
-        ctx.lists["user.talon_hud_themes"] = themes
+        self.update_context_list("user.talon_hud_numerical_choices", numerical_choices)
+        self.update_context_list("user.talon_hud_widget_names", widget_names)
+        self.update_context_list("user.talon_hud_choices", choices)
+        self.update_context_list("user.talon_hud_quick_choices", quick_choices)
+        self.update_context_list("user.talon_hud_themes", self.theme_registry.get_speakable_themes())
         
         self.enabled_voice_commands = enabled_voice_commands
-        ctx.lists["user.talon_hud_widget_enabled_voice_commands"] = enabled_voice_commands.keys()
+        self.update_context_list("user.talon_hud_widget_enabled_voice_commands", list(enabled_voice_commands.keys()))
+
+    # Only assign a context list if its contents have changed, as every assignment makes Talon recompile its grammar
+    def update_context_list(self, list_name: str, list_contents):
+        if self.context_lists is None:
+            self.context_lists = {}
+        
+        if list_name not in self.context_lists or self.context_lists[list_name] != list_contents:
+            self.context_lists[list_name] = list_contents
+            ctx.lists[list_name] = list_contents
+
+    # Get the entries that a widget adds to the context lists
+    # These are only determined again when the state of the widget that affects them has changed
+    def get_widget_context_entries(self, widget) -> dict:
+        if self.widget_context_entries is None:
+            self.widget_context_entries = {}
+    
+        is_text_panel = isinstance(widget, HeadUpTextPanel)
+        is_context_menu = isinstance(widget, HeadUpContextMenu)
+        is_choice_panel = isinstance(widget, HeadUpChoicePanel)
+        signature = (widget.enabled, 
+            widget.panel_content.title if is_text_panel else None,
+            tuple(button.text for button in widget.buttons),
+            tuple((voice_command.command, voice_command.callback) for voice_command in widget.panel_content.voice_commands) \
+                if widget.enabled and is_text_panel and widget.panel_content.voice_commands else None,
+            tuple(choice.text for choice in widget.choices) if widget.enabled and is_choice_panel else None,
+            bool(widget.panel_content.choices and widget.panel_content.choices.multiple) if widget.enabled and is_choice_panel else None
+        )
+        
+        if widget.id in self.widget_context_entries and self.widget_context_entries[widget.id][0] == signature:
+            return self.widget_context_entries[widget.id][1]
+            
+        context_entries = {
+            "widget_names": {},
+            "quick_choices": {},
+            "choices": {},
+            "numerical_choices": {},
+            "enabled_voice_commands": {}
+        }
+        
+        current_widget_names = [string_to_speakable_string(widget.id)]        
+        if is_text_panel:
+            content_title = string_to_speakable_string(widget.panel_content.title)
+            if content_title:
+                current_widget_names.append(content_title)
+                
+        for widget_name in current_widget_names:
+            context_entries["widget_names"][widget_name] = widget.id
+            
+        # Add quick choices
+        button_titles = strings_to_speakable_strings([button.text for button in widget.buttons])
+        for index, choice_title in enumerate(button_titles):
+            if choice_title:
+                for widget_name in current_widget_names:
+                    context_entries["quick_choices"][widget_name + " " + choice_title] = widget.id + "|" + str(index)
+        
+        # Add context choices
+        if widget.enabled and is_context_menu:
+            for index, choice_title in enumerate(button_titles):
+                if choice_title:
+                    context_entries["choices"][choice_title] = widget.id + "|" + str(index)
+
+        # Add extra voice commands ( for instance, ones alluded to in text )
+        if widget.enabled and is_text_panel and widget.panel_content.voice_commands:
+            for index, voice_command in enumerate(widget.panel_content.voice_commands):
+                enabled_voice_command = string_to_speakable_string(voice_command.command)
+                if enabled_voice_command:
+                    context_entries["enabled_voice_commands"][enabled_voice_command] = voice_command.callback
+         
+        # Add choice panel choices
+        if widget.enabled and is_choice_panel:
+            choice_titles = strings_to_speakable_strings([choice.text for choice in widget.choices])
+            for index, choice_title in enumerate(choice_titles):
+                if choice_title:
+                    context_entries["choices"][choice_title] = widget.id + "|" + str(index)
+                context_entries["numerical_choices"][numerical_choice_strings[index]] = widget.id + "|" + str(index)
+                    
+            if widget.panel_content.choices and widget.panel_content.choices.multiple:
+                context_entries["choices"]["confirm"] = widget.id + "|" + str(len(widget.choices))
+        
+        self.widget_context_entries[widget.id] = (signature, context_entries)
+        return context_entries
 
     def hud_environment_change(self, hud_environment: str):
         if self.current_talon_hud_environment != hud_environment:
@@ -749,6 +880,7 @@ class HeadUpDisplay:
         self.synchronize_pollers(disable_pollers=False, enable_pollers=True)
 
     def destroy(self):
+        self.theme_registry.unwatch()
         cron.cancel(self.disable_poller_job)
         cron.cancel(self.update_environment_debouncer)
         self.event_dispatch.unregister("persist_preferences", self.debounce_widget_preferences)
@@ -823,6 +955,11 @@ class Actions:
         """Disables a specific HUD element"""
         global hud
         hud.disable_id(id)
+
+    def hud_toggle_id(id: str):
+        """Enables a specific HUD element if it is disabled, or disables it otherwise"""
+        global hud
+        hud.toggle_id(id)
         
     def hud_switch_theme(theme_name: str):
         """Switches the UI theme"""
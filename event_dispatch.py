@@ -18,4 +18,7 @@ class HeadUpEventDispatch(Dispatch):
         self.dispatch("deactivate_poller", poller_name)
         
     def synchronize_widget_poller(self, widget_id):
-        self.dispatch("synchronize_poller", widget_id)
\ No newline at end of file
+        self.dispatch("synchronize_poller", widget_id)
+        
+    def invalidate_content_routes(self):
+        self.dispatch("invalidate_content_routes", True)
\ No newline at end of file
@@ -0,0 +1,71 @@
+import math
+
+# Spatial index of rectangles on a uniform grid of square cells
+# Every rectangle is added to the cells it overlaps, so a point query only has to check the rectangles of a single cell
+# Rectangles that would span too many cells are kept aside and are checked for every query instead
+class HudRectIndex:
+
+    max_cells_per_rect = 256
+
+    def __init__(self, rects: list, cell_size: int = 128):
+        self.rects = rects
+        self.cell_size = cell_size
+        self.cells = {}
+        self.oversized_indices = []
+
+        for index, rect in enumerate(rects):
+            if rect is None:
+                continue
+
+            min_column, min_row, max_column, max_row = self.get_cell_bounds(rect)
+            if (max_column - min_column + 1) * (max_row - min_row + 1) > self.max_cells_per_rect:
+                self.oversized_indices.append(index)
+            else:
+                for column in range(min_column, max_column + 1):
+                    for row in range(min_row, max_row + 1):
+                        if (column, row) in self.cells:
+                            self.cells[(column, row)].append(index)
+                        else:
+                            self.cells[(column, row)] = [index]
+
+    def get_cell_bounds(self, rect) -> tuple:
+        return (math.floor(rect.x / self.cell_size), math.floor(rect.y / self.cell_size),
+            math.floor((rect.x + rect.width) / self.cell_size), math.floor((rect.y + rect.height) / self.cell_size))
+
+    # Get the indices of the rectangles that contain the point, edges included, in the order the rectangles were given
+    def query_point(self, x: float, y: float) -> list[int]:
+        candidates = self.cells.get((math.floor(x / self.cell_size), math.floor(y / self.cell_size)), [])
+        if self.oversized_indices:
+            candidates = sorted(candidates + self.oversized_indices)
+
+        indices = []
+        for index in candidates:
+            rect = self.rects[index]
+            if x >= rect.x and x <= rect.x + rect.width and y >= rect.y and y <= rect.y + rect.height:
+                indices.append(index)
+        return indices
+
+    # Get the index of the smallest rectangle that contains the point, the first one given wins when they are equally large
+    def query_smallest(self, x: float, y: float) -> int:
+        smallest_index = None
+        smallest_size = None
+        for index in self.query_point(x, y):
+            size = self.rects[index].width * self.rects[index].height
+            if smallest_size is None or size < smallest_size:
+                smallest_size = size
+                smallest_index = index
+        return smallest_index
+
+# Scalar point tests for the mouse event handling, which runs for every mouse movement
+# These compare squared distances so no square roots or intermediate arrays are needed
+def squared_distance(x_a: float, y_a: float, x_b: float, y_b: float) -> float:
+    delta_x = x_a - x_b
+    delta_y = y_a - y_b
+    return delta_x * delta_x + delta_y * delta_y
+
+# Whether the mouse has moved further than the threshold since the previous position
+def has_moved(pos, previous_pos, threshold: float) -> bool:
+    return previous_pos is None or squared_distance(pos[0], pos[1], previous_pos[0], previous_pos[1]) > threshold * threshold
+
+def hit_test_circle(center_x: float, center_y: float, radius: float, x: float, y: float) -> bool:
+    return squared_distance(center_x, center_y, x, y) < radius * radius
@@ -2,6 +2,7 @@ from talon import canvas, ui
 from .base_widget import BaseWidget
 from .utils import layout_rich_text
 from .content.typing import HudContentPage, HudPanelContent
+from .performance import performance_tracer
 from random import randint
 
 class LayoutWidget(BaseWidget):
@@ -140,6 +141,13 @@ class LayoutWidget(BaseWidget):
         # Determine the dimensions and positions of the content
         return [{"rect": ui.Rect(self.limit_x, self.limit_y, self.limit_width, self.limit_height)}]
         
+    def update_layout(self, canvas, paint):
+        # Determine the layout of the content while keeping track of how long it takes
+        trace_start = performance_tracer.start()
+        layout = self.layout_content(canvas, paint)
+        performance_tracer.record("layout_content", self.id, trace_start)
+        return layout
+        
     def draw_content(self, canvas, paint, dimensions) -> bool:
         # Draw the content using the layout given dimensions
         return False
@@ -148,7 +156,7 @@ class LayoutWidget(BaseWidget):
         paint = self.draw_setup_mode(canvas)
         
         if self.mark_layout_invalid:
-            self.layout = self.layout_content(canvas, paint)
+            self.layout = self.update_layout(canvas, paint)
             
         if self.page_index > len(self.layout) - 1:
             self.page_index = max(0, len(self.layout) -1)
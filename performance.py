@@ -0,0 +1,203 @@
+from bisect import bisect_left
+from collections import deque
+import time
+
+# Upper bounds in milliseconds of the buckets that durations are counted in
+# The buckets grow logarithmically so both quick content updates and slow draws can be told apart
+latency_bucket_bounds_ms = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+
+# Histogram of durations that never grows beyond a fixed size, regardless of how many durations are recorded
+class HudLatencyHistogram:
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(latency_bucket_bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, duration_ms: float):
+        self.bucket_counts[bisect_left(latency_bucket_bounds_ms, duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    # Get the upper bound of the bucket that contains the given percentile of the recorded durations
+    def get_percentile(self, percentile: float) -> float:
+        if self.count == 0:
+            return 0.0
+
+        threshold = self.count * percentile / 100
+        seen = 0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            seen += bucket_count
+            if seen >= threshold and bucket_count > 0:
+                return min(latency_bucket_bounds_ms[index], self.max_ms) if index < len(latency_bucket_bounds_ms) else self.max_ms
+        return self.max_ms
+
+    def get_stats(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.get_percentile(50),
+            "p95_ms": self.get_percentile(95),
+            "p99_ms": self.get_percentile(99),
+            "buckets": dict(zip([str(bound) for bound in latency_bucket_bounds_ms] + ["inf"], self.bucket_counts))
+        }
+
+# Records how long the stages of the content pipeline take, per topic or per widget
+# Tracing is disabled by default, in which case the stages only do a single attribute check
+class HudPerformanceTracer:
+
+    enabled = False
+    histograms = None
+    published_times = None # The time at which the last event of a topic was published
+    pending_times = None # The time at which the oldest content that a widget has not drawn yet was published
+
+    def __init__(self):
+        self.clear()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        self.clear()
+
+    def clear(self):
+        self.histograms = {}
+        self.published_times = {}
+        self.pending_times = {}
+
+    # Get the start time of a stage, or zero when tracing is disabled
+    def start(self) -> float:
+        return time.perf_counter() if self.enabled else 0
+
+    # Record the duration of a stage that started at the given time
+    def record(self, stage: str, key: str, start: float):
+        if self.enabled and start:
+            self.record_duration(stage, key, (time.perf_counter() - start) * 1000)
+
+    def record_duration(self, stage: str, key: str, duration_ms: float):
+        if stage not in self.histograms:
+            self.histograms[stage] = {}
+        if key not in self.histograms[stage]:
+            self.histograms[stage][key] = HudLatencyHistogram()
+        self.histograms[stage][key].record(duration_ms)
+
+    # Keep track of when content was published, so the time until it is drawn can be determined
+    def mark_published(self, topic_type: str, topic: str):
+        if self.enabled:
+            self.published_times[(topic_type, topic)] = time.perf_counter()
+
+    def mark_handled(self, widget_id: str, topic_type: str, topic: str):
+        if self.enabled and (topic_type, topic) in self.published_times and widget_id not in self.pending_times:
+            self.pending_times[widget_id] = self.published_times[(topic_type, topic)]
+
+    def mark_drawn(self, widget_id: str):
+        if self.enabled and widget_id in self.pending_times:
+            self.record_duration("publish_to_draw", widget_id, (time.perf_counter() - self.pending_times[widget_id]) * 1000)
+            del self.pending_times[widget_id]
+
+    def get_stats(self) -> dict:
+        stats = {}
+        for stage in self.histograms:
+            stats[stage] = {}
+            for key in self.histograms[stage]:
+                stats[stage][key] = self.histograms[stage][key].get_stats()
+        return stats
+
+performance_tracer = HudPerformanceTracer()
+
+# Frame timings of a single widget canvas, kept in fixed size windows so profiling can run indefinitely
+class HudFrameStats:
+
+    max_recorded_frames = 120
+
+    def __init__(self):
+        self.draw_durations_ms = deque(maxlen=self.max_recorded_frames)
+        self.frame_times = deque(maxlen=self.max_recorded_frames)
+        self.frame_count = 0
+        self.resumed_since = None
+        self.paused_since = None
+        self.resumed_seconds = 0.0
+        self.paused_seconds = 0.0
+
+    def record_frame(self, start: float, end: float, continue_drawing: bool):
+        # A draw after a pause means the canvas was resumed just before it
+        if self.resumed_since is None:
+            if self.paused_since is not None:
+                self.paused_seconds += start - self.paused_since
+                self.paused_since = None
+            self.resumed_since = start
+
+        self.draw_durations_ms.append((end - start) * 1000)
+        self.frame_times.append(end)
+        self.frame_count += 1
+
+        if not continue_drawing:
+            self.resumed_seconds += end - self.resumed_since
+            self.resumed_since = None
+            self.paused_since = end
+
+    # Frames per second over the last second of drawing, which is only meaningful while animating
+    def get_frames_per_second(self, now: float) -> float:
+        if self.resumed_since is None or len(self.frame_times) < 2:
+            return 0.0
+
+        recent_frames = [frame_time for frame_time in self.frame_times if now - frame_time <= 1.0]
+        if len(recent_frames) < 2:
+            return 0.0
+        return (len(recent_frames) - 1) / max(recent_frames[-1] - recent_frames[0], 0.001)
+
+    def get_stats(self, now: float) -> dict:
+        resumed_seconds = self.resumed_seconds + (now - self.resumed_since if self.resumed_since is not None else 0)
+        paused_seconds = self.paused_seconds + (now - self.paused_since if self.paused_since is not None else 0)
+        return {
+            "frames": self.frame_count,
+            "mean_draw_ms": sum(self.draw_durations_ms) / len(self.draw_durations_ms) if self.draw_durations_ms else 0.0,
+            "max_draw_ms": max(self.draw_durations_ms) if self.draw_durations_ms else 0.0,
+            "fps": self.get_frames_per_second(now),
+            "resumed": self.resumed_since is not None,
+            "resumed_seconds": resumed_seconds,
+            "paused_seconds": paused_seconds
+        }
+
+# Records the frame timings of every widget canvas for the profiler widget
+# Like the tracer, profiling is disabled by default and only costs a single attribute check per frame
+class HudFrameProfiler:
+
+    enabled = False
+    widget_stats = None
+
+    def __init__(self):
+        self.clear()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        self.clear()
+
+    def clear(self):
+        self.widget_stats = {}
+
+    # Get the start time of a frame, or zero when profiling is disabled
+    def start(self) -> float:
+        return time.perf_counter() if self.enabled else 0
+
+    def record_frame(self, widget_id: str, start: float, continue_drawing: bool):
+        if self.enabled and start:
+            if widget_id not in self.widget_stats:
+                self.widget_stats[widget_id] = HudFrameStats()
+            self.widget_stats[widget_id].record_frame(start, time.perf_counter(), continue_drawing)
+
+    def get_stats(self) -> dict:
+        now = time.perf_counter()
+        stats = {}
+        for widget_id in self.widget_stats:
+            stats[widget_id] = self.widget_stats[widget_id].get_stats(now)
+        return stats
+
+frame_profiler = HudFrameProfiler()
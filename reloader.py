@@ -23,7 +23,14 @@ def clear_old_references():
             _reloader_state[key_hud][index] = None
 
     # Keep the first content state around as it is the most likely to be filled
-    content_topic_types = copy.copy(_reloader_state[key_content][0].topic_types) if len(_reloader_state[key_content]) > 0 else {}    
+    content_topic_types = {}
+    content_version = 0
+    if len(_reloader_state[key_content]) > 0:
+        content_state = _reloader_state[key_content][0]
+        
+        # Content states from before versioning was added do not have snapshots
+        content_topic_types = content_state.get_snapshot() if hasattr(content_state, "get_snapshot") else copy.copy(content_state.topic_types)
+        content_version = content_state.version if hasattr(content_state, "version") else 0
     for key in _reloader_state:
         if key not in [key_hud, key_poller] and len(_reloader_state[key]) > 0:
             for index, extra_type in enumerate(_reloader_state[key]):
@@ -32,7 +39,7 @@ def clear_old_references():
             _reloader_state[key] = [_reloader_state[key][-1]]
     
     if len(_reloader_state[key_content]) > 0:
-        _reloader_state[key_content][0].topic_types = content_topic_types
+        _reloader_state[key_content][0].restore_snapshot(content_topic_types, content_version)
         
     if len(_reloader_state[key_hud]) > 0:
         _reloader_state[key_hud] = [_reloader_state[key_hud][-1]]
@@ -1,11 +1,59 @@
-from talon import skia, app
+from talon import skia, app, fs
 import os
 import random
-from .utils import hex_to_ints
+from .utils import hex_to_ints, string_to_speakable_string
 import logging
 
 semantic_directory = os.path.dirname(os.path.abspath(__file__))
 
+# Keeps track of the available themes and their speakable names
+# The themes directory is only scanned again after a change has been made to it or when a theme is registered
+class HeadUpThemeRegistry:
+
+    themes_dir = ''
+    custom_themes = None
+    speakable_themes = None
+    watching = False
+    
+    def __init__(self, themes_dir=None):
+        self.themes_dir = themes_dir if themes_dir is not None else os.path.join(semantic_directory, "themes")
+        self.custom_themes = {}
+        self.speakable_themes = None
+
+    # Add a theme from outside of the themes directory
+    def add_theme(self, theme_name, theme_dir):
+        self.custom_themes[theme_name] = theme_dir
+        self.refresh()
+
+    # Get the directory of a theme registered from outside of the themes directory, or None for the themes inside it
+    def get_theme_dir(self, theme_name):
+        return self.custom_themes[theme_name] if theme_name in self.custom_themes else None
+    
+    # Get the available themes by their speakable names
+    def get_speakable_themes(self) -> dict:
+        if self.speakable_themes is None:
+            speakable_themes = {}
+            for theme in os.listdir(self.themes_dir):
+                if theme != "_base_theme":
+                    speakable_themes[string_to_speakable_string(theme)] = theme
+            for custom_theme_name in self.custom_themes:
+                speakable_themes[string_to_speakable_string(custom_theme_name)] = custom_theme_name
+            self.speakable_themes = speakable_themes
+        return self.speakable_themes
+    
+    def refresh(self, _ = None, __ = None):
+        self.speakable_themes = None
+
+    def watch(self):
+        if not self.watching:
+            fs.watch(self.themes_dir, self.refresh)
+            self.watching = True
+    
+    def unwatch(self):
+        if self.watching:
+            fs.unwatch(self.themes_dir, self.refresh)
+            self.watching = False
+
 # Contains all the values related to styling ( images, colours etc )
 class HeadUpDisplayTheme:
 
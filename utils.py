@@ -1,10 +1,13 @@
 from talon import skia, ui
 from talon.types.point import Point2d
-from .content.typing import HudRichText, HudRichTextLine, HudButton, HudIcon
+from .content.typing import HudRichText, HudRichTextLine, HudButton, HudIcon, HudRichTextToken, HudRichTextLayout, \
+    RICH_TEXT_TOKEN_TEXT, RICH_TEXT_TOKEN_STYLE_START, RICH_TEXT_TOKEN_STYLE_END, RICH_TEXT_TOKEN_LINE_BREAK
 from textwrap import wrap
+from collections import OrderedDict
+from functools import lru_cache
 import math
 import re
-import numpy
+from .geometry import hit_test_circle
 
 rich_text_delims_dict = {
     "/>": "end", # GENERAL STYLE END - We only use a single token for this to not have to deal with issues where nested styles get changed out of order
@@ -21,32 +24,69 @@ rich_text_delims_dict = {
 rich_text_delims = rich_text_delims_dict.keys()
 rich_text_delims_regex = r"(/>|<\*|</|<\+|<\!\!|<\!|<@|<cmd@)"
 
+# The rich text delimiters along with every line boundary that str.splitlines uses
+rich_text_tokens_regex = re.compile(r"(/>|<\*|</|<\+|<\!\!|<\!|<@|<cmd@|\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029])")
+rich_text_style_tokens = {delim: HudRichTextToken(RICH_TEXT_TOKEN_STYLE_END if style == "end" else RICH_TEXT_TOKEN_STYLE_START, style) \
+    for delim, style in rich_text_delims_dict.items()}
+
+@lru_cache(maxsize=1024)
+def tokenize_rich_text(text: str) -> tuple[HudRichTextToken]:
+    """Parses rich text once into an immutable stream of style, text and line break tokens"""
+    tokens = []
+    
+    # The split alternates between the text in between delimiters and the delimiters themselves
+    for index, part in enumerate(rich_text_tokens_regex.split(text)):
+        if part == "":
+            continue
+        elif index % 2 == 0:
+            tokens.append(HudRichTextToken(RICH_TEXT_TOKEN_TEXT, part))
+        elif part in rich_text_style_tokens:
+            tokens.append(rich_text_style_tokens[part])
+        else:
+            tokens.append(HudRichTextToken(RICH_TEXT_TOKEN_LINE_BREAK, part))
+    return tuple(tokens)
+
+@lru_cache(maxsize=1024)
+def tokenize_rich_text_lines(text: str) -> tuple[tuple[HudRichTextToken]]:
+    """Splits the token stream of rich text into lines the same way str.splitlines would"""
+    lines = []
+    line = []
+    for token in tokenize_rich_text(text):
+        if token.type == RICH_TEXT_TOKEN_LINE_BREAK:
+            lines.append(tuple(line))
+            line = []
+        else:
+            line.append(token)
+    
+    # Like splitlines, a trailing line break does not start a new line
+    if len(line) > 0:
+        lines.append(tuple(line))
+    return tuple(lines)
+
 def remove_tokens_from_rich_text(text:str):
-    return re.sub(rich_text_delims_regex, "", text)
+    return "".join([token.value for token in tokenize_rich_text(text) \
+        if token.type == RICH_TEXT_TOKEN_TEXT or token.type == RICH_TEXT_TOKEN_LINE_BREAK])
     
 def retrieve_available_voice_commands(text: str):
     voice_commands = []
-    tokened_text = re.split( rich_text_delims_regex, text)
-    tokened_text = [x for x in tokened_text if x != ""]
     words_to_use = []
     
     styles = []
-    for token in tokened_text:
-        if token in rich_text_delims:
-            if token == "/>":
-                if len(styles) > 0:
-                    in_voice_command = "command_available" in styles
-                    styles.pop()
-                    if in_voice_command and "command_available" not in styles and len(words_to_use) > 0:
-                        voice_commands.append(string_to_speakable_string(" ".join(words_to_use)))
-                        words_to_use = []                        
-            else:
-                if rich_text_delims_dict[token] == "command_available" and \
-                    "command_available" not in styles:
+    for token in tokenize_rich_text(text):
+        if token.type == RICH_TEXT_TOKEN_STYLE_END:
+            if len(styles) > 0:
+                in_voice_command = "command_available" in styles
+                styles.pop()
+                if in_voice_command and "command_available" not in styles and len(words_to_use) > 0:
+                    voice_commands.append(string_to_speakable_string(" ".join(words_to_use)))
                     words_to_use = []
-                styles.append(rich_text_delims_dict[token])
-        else:
-            words_to_use += token.split()
+        elif token.type == RICH_TEXT_TOKEN_STYLE_START:
+            if token.value == "command_available" and \
+                "command_available" not in styles:
+                words_to_use = []
+            styles.append(token.value)
+        elif token.type == RICH_TEXT_TOKEN_TEXT:
+            words_to_use += token.value.split()
         
     # Edge case - Clean up remaining commands        
     if "command_available" in styles:
@@ -54,165 +94,369 @@ def retrieve_available_voice_commands(text: str):
 
     return voice_commands
 
+class HudLayoutCache:
+    """Keeps the most recently used rich text layouts around so unchanged texts do not need to be measured again"""
+    max_size = 256
+    hits = 0
+    misses = 0
+    
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self.layouts = OrderedDict()
+    
+    def get(self, key):
+        layout = self.layouts.get(key)
+        if layout is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.layouts.move_to_end(key)
+        return layout
+    
+    def set(self, key, layout):
+        self.layouts[key] = layout
+        self.layouts.move_to_end(key)
+        if len(self.layouts) > self.max_size:
+            self.layouts.popitem(last=False)
+    
+    def clear(self):
+        self.layouts.clear()
+        self.hits = 0
+        self.misses = 0
+    
+    def get_stats(self) -> dict:
+        return {
+            "size": len(self.layouts),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+layout_cache = HudLayoutCache()
+
+def get_font_key(paint: skia.Paint) -> tuple:
+    return (paint.typeface, paint.textsize, paint.font.embolden)
+
 def layout_rich_text(paint:skia.Paint, text:str, width:int = 1920, height:int = 1080) -> list[HudRichTextLine]:
+    """Layout a string of text inside the given dimensions, reusing earlier layouts of the same text and font"""
+    
+    # The height is not used during the layout so it does not need to be part of the key
+    key = (text, width, get_font_key(paint))
+    layout = layout_cache.get(key)
+    if layout is None:
+        layout = calculate_rich_text_layout(paint, text, width, height)
+        layout_cache.set(key, layout)
+    else:
+        paint.font.embolden = False
+    
+    # Cached rich text should never be changed in place, so copying the list itself is enough
+    return list(layout)
+
+def calculate_rich_text_layout(paint:skia.Paint, text:str, width:int = 1920, height:int = 1080) -> list[HudRichTextLine]:
     """Layout a string of text inside the given dimensions"""
-    _, e_text_bounds = paint.measure_text("E")
-    _, space_text_bounds = paint.measure_text("E E")
-    space_text_bounds.width -= e_text_bounds.width * 2
+    space_text_bounds = get_space_text_bounds(paint)
     
-    lines = text.splitlines()
     final_lines = []
     
     styles = []
-    for line_index, line in enumerate(lines):        
-        current_char_index = 0
-        char_indexes = {}
+    for tokened_line in tokenize_rich_text_lines(text):
+        layout_rich_text_line(paint, tokened_line, width, styles, space_text_bounds, final_lines)
+    
+    paint.font.embolden = False
+    return final_lines
+
+line_break_characters = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+def layout_rich_text_incrementally(paint:skia.Paint, text:str, width:int = 1920, previous_layout: HudRichTextLayout = None) -> HudRichTextLayout:
+    """Layout a string of text inside the given width, only laying out the lines that have changed since the previous layout"""
+    font_key = get_font_key(paint)
+    space_text_bounds = get_space_text_bounds(paint)
+    lines = text.splitlines()
+    
+    unchanged_lines = 0
+    if previous_layout is not None and previous_layout.width == width and previous_layout.font_key == font_key:
+        previous_lines = previous_layout.lines
         
-        tokened_line = re.split(rich_text_delims_regex, line)
-        tokened_line = [x for x in tokened_line if x != ""]
+        # Appending text can only change the last line, unless the previous text ended with a line break
+        if text.startswith(previous_layout.text):
+            unchanged_lines = len(previous_lines) if previous_layout.text[-1:] in line_break_characters else len(previous_lines) - 1
+            unchanged_lines = max(0, unchanged_lines)
+        else:
+            max_unchanged_lines = min(len(lines), len(previous_lines))
+            while unchanged_lines < max_unchanged_lines and lines[unchanged_lines] == previous_lines[unchanged_lines]:
+                unchanged_lines += 1
+    
+    if unchanged_lines > 0:
+        line_states = previous_layout.line_states[:unchanged_lines + 1]
+        line_indices = previous_layout.line_indices[:unchanged_lines + 1]
+        rich_text = previous_layout.rich_text[:line_indices[-1]]
+        styles = list(line_states[-1][0])
+        paint.font.embolden = line_states[-1][1]
+    else:
+        styles = []
+        line_states = [((), paint.font.embolden)]
+        line_indices = [0]
+        rich_text = []
+    changed_index = len(rich_text)
+    
+    for line in lines[unchanged_lines:]:
+        layout_rich_text_line(paint, tokenize_rich_text(line), width, styles, space_text_bounds, rich_text)
+        line_states.append((tuple(styles), paint.font.embolden))
+        line_indices.append(len(rich_text))
+    
+    paint.font.embolden = False
+    return HudRichTextLayout(text, width, font_key, lines, line_states, line_indices, rich_text, changed_index)
+
+def layout_rich_text_line(paint:skia.Paint, tokened_line: tuple[HudRichTextToken], width: int, styles: list[str], space_text_bounds: ui.Rect, final_lines: list[HudRichText]):
+    """Layout a single line of rich text tokens, adding the results to the final lines and keeping track of the styles in place"""
+    x = 0
+    
+    # Edge case - Empty newline
+    if len(tokened_line) == 0:
+        final_lines.append(HudRichText(x, space_text_bounds.y, space_text_bounds.width, space_text_bounds.height, [], " "))
+        return
+    
+    words_to_use = []
+    words_run = empty_words_run
+    for token in tokened_line:
+        if token.type != RICH_TEXT_TOKEN_TEXT:
+            # Finish the current words if there are any
+            if len(words_to_use) > 0:
+                run_y, run_width, run_height = get_words_run_bounds(words_run, space_text_bounds)
+                final_lines.append(HudRichText(x, run_y, run_width, run_height, styles.copy(), " ".join(words_to_use)))
+                x = x + run_width
+            words_to_use = []
+            words_run = empty_words_run
+            if token.type == RICH_TEXT_TOKEN_STYLE_END:
+                if len(styles) > 0:
+                    styles.pop()
+                    
+                # Unbold the text for the proper height measurements
+                if "bold" not in styles:
+                    paint.font.embolden = False
+            else:
+                # Bold the text for the proper height measurements
+                if token.value == "bold":
+                    paint.font.embolden = True
+                styles.append(token.value)
             
-        x = 0
-        
-        # Edge case - Empty newline
-        if len(tokened_line) == 0:
-            final_lines.append(HudRichText(x, space_text_bounds.y, space_text_bounds.width, space_text_bounds.height, [], " "))
-            continue
-        
-        words_to_use = []
-        current_line_bounds = None
-        for token in tokened_line:
-            if token in rich_text_delims:                
-                # Finish the current words if there are any
-                if current_line_bounds != None and len(words_to_use) > 0:
-                    current_line_bounds = calculate_words_bounds(words_to_use, paint, space_text_bounds)
-                    final_lines.append(HudRichText(x, current_line_bounds.y, current_line_bounds.width, current_line_bounds.height, styles.copy(), " ".join(words_to_use)))                
-                    x = x + current_line_bounds.width
-                    current_line_bounds.y = current_line_bounds.y
-                    current_line_bounds.width = 0
-                    current_line_bounds.height = 0
-                words_to_use = []
-                if token == "/>":
-                    if len(styles) > 0:
-                        styles.pop()
-                        
-                    # Unbold the text for the proper height measurements
-                    if "bold" not in styles:
-                        paint.font.embolden = False
-                else:
-                    # Bold the text for the proper height measurements
-                    if rich_text_delims_dict[token] == "bold":                        
-                        paint.font.embolden = True
-                    styles.append(rich_text_delims_dict[token])
+        # Add text
+        else:
+            words_run = empty_words_run
+            
+            # The font can only change between tokens, so the measurements of the current font can be reused for every word
+            word_measurements = get_word_measurements(paint)
+            space_advance = measure_word(paint, " ", word_measurements)[0]
+            for word in token.value.split(" "):
+                word_measurement = measure_word(paint, word, word_measurements)
+                extended_words_run = extend_words_run(words_run, word, word_measurement, space_advance)
+                _, run_width, _ = get_words_run_bounds(extended_words_run, space_text_bounds)
                 
-            # Add text
-            else:
-                words = token.split(" ")
-                current_words = []
-                amount_of_words = len(words)
-                for index, word in enumerate(words):
-                    current_words.append(word)
+                if x + run_width > width:
+                    run_y, run_width, run_height = get_words_run_bounds(words_run, space_text_bounds)
+                    final_lines.append(HudRichText(x, run_y, run_width, run_height, styles.copy(), " ".join(words_to_use)))
+                    x = 0
                     
-                    # Edge case - string starts with a space
-                    if word == "" and len(current_words) == 0:
-                        current_line_bounds = space_text_bounds
-                        word_bounds = space_text_bounds
-                    else:
-                        _, word_bounds = paint.measure_text(word)
-                        current_line_bounds = calculate_words_bounds(current_words, paint, space_text_bounds)
-                    
-                    if x + current_line_bounds.width > width:
-                        current_words.pop()
-                        current_line_bounds = calculate_words_bounds(current_words, paint, space_text_bounds)
-                        final_lines.append(HudRichText(x, current_line_bounds.y, current_line_bounds.width, current_line_bounds.height, styles.copy(), " ".join(words_to_use)))
-                        x = 0
-                        y = 0
+                    word_width = word_measurement[3]
+                    if word_width < width:
+                        words_run = extend_words_run(empty_words_run, word, word_measurement, space_advance)
+                        words_to_use = [word]
                         
-                        if word_bounds.width < width:
-                            current_words = [word]
-                            words_to_use = [word]
-                            
-                        # Edgecase - Single word that exceeds the width - Split according to rough estimate or character width
-                        else:
-                            word_length = len(word)
-                            split_ratio = width / word_bounds.width
-                            wrapped_words = wrap(word, max(1, int(math.floor(word_length * split_ratio))))
-                            for index, wrapped_word in enumerate(wrapped_words):
-                                _, wrapped_word_bounds = paint.measure_text(wrapped_word)                            
-                                if index < len(wrapped_words) - 1:
-                                    final_lines.append(HudRichText(x, wrapped_word_bounds.y, wrapped_word_bounds.width, wrapped_word_bounds.height, styles.copy(), wrapped_word))
-                                else:
-                                    current_line_bounds = wrapped_word_bounds
-                                    words_to_use = [wrapped_word]
-                            
+                    # Edgecase - Single word that exceeds the width - Split according to rough estimate or character width
                     else:
-                        words_to_use.append(word)
-                    
-        if len(words_to_use) > 0:
-            current_line_bounds = calculate_words_bounds(words_to_use, paint, space_text_bounds)
-        
-            final_lines.append(HudRichText(x, current_line_bounds.y, current_line_bounds.width, current_line_bounds.height, styles.copy(), " ".join(words_to_use)))            
+                        word_length = len(word)
+                        split_ratio = width / word_width
+                        wrapped_words = wrap(word, max(1, int(math.floor(word_length * split_ratio))))
+                        for index, wrapped_word in enumerate(wrapped_words):
+                            wrapped_word_measurement = measure_word(paint, wrapped_word, word_measurements)
+                            if index < len(wrapped_words) - 1:
+                                _, _, wrapped_y, wrapped_width, wrapped_height = wrapped_word_measurement
+                                final_lines.append(HudRichText(x, wrapped_y, wrapped_width, wrapped_height, styles.copy(), wrapped_word))
+                            else:
+                                words_run = extend_words_run(empty_words_run, wrapped_word, wrapped_word_measurement, space_advance)
+                                words_to_use = [wrapped_word]
+                else:
+                    words_run = extended_words_run
+                    words_to_use.append(word)
+                
+    if len(words_to_use) > 0:
+        run_y, run_width, run_height = get_words_run_bounds(words_run, space_text_bounds)
+        final_lines.append(HudRichText(x, run_y, run_width, run_height, styles.copy(), " ".join(words_to_use)))
+
+# Word measurements are shared between all widgets, grouped by the font they were measured with
+word_measurement_cache = {}
+word_measurement_cache_max_size = 25000
+space_text_bounds_cache = {}
+
+def get_word_measurements(paint: skia.Paint) -> dict:
+    """Returns the cached word measurements of the current font of the paint"""
+    font_key = get_font_key(paint)
+    word_measurements = word_measurement_cache.get(font_key)
+    if word_measurements is None:
+        word_measurements = {}
+        word_measurement_cache[font_key] = word_measurements
     
-    paint.font.embolden = False
-    return final_lines
+    # Start over when too many different words have been measured to keep the memory in check
+    elif len(word_measurements) > word_measurement_cache_max_size:
+        word_measurements.clear()
+    return word_measurements
+
+def measure_word(paint: skia.Paint, word: str, word_measurements: dict = None) -> tuple:
+    """Measures a single word as (advance, x, y, width, height), reusing earlier measurements of the same word and font"""
+    if word_measurements is None:
+        word_measurements = get_word_measurements(paint)
+    word_measurement = word_measurements.get(word)
+    if word_measurement is None:
+        advance, bounds = paint.measure_text(word)
+        word_measurement = (advance, bounds.x, bounds.y, bounds.width, bounds.height)
+        word_measurements[word] = word_measurement
+    return word_measurement
+
+def get_space_text_bounds(paint: skia.Paint) -> ui.Rect:
+    """Returns the bounds of a single space between words of the current font of the paint"""
+    font_key = get_font_key(paint)
+    space_bounds = space_text_bounds_cache.get(font_key)
+    if space_bounds is None:
+        _, e_text_bounds = paint.measure_text("E")
+        _, space_text_bounds = paint.measure_text("E E")
+        space_bounds = (space_text_bounds.x, space_text_bounds.y, space_text_bounds.width - e_text_bounds.width * 2, space_text_bounds.height)
+        space_text_bounds_cache[font_key] = space_bounds
+    return ui.Rect(*space_bounds)
+
+# A run of space separated words is kept as (word_count, leading_spaces, trailing_spaces, left, right, pen, top, bottom)
+# Where left and right are the outer edges of the drawn text and pen is the advance after the last non-empty word
+# This allows the bounds of a line to be extended one word at a time instead of measuring the whole line again
+empty_words_run = (0, 0, 0, 0, 0, 0, None, None)
+
+def extend_words_run(words_run: tuple, word: str, word_measurement: tuple, space_advance: float) -> tuple:
+    word_count, leading_spaces, trailing_spaces, left, right, pen, top, bottom = words_run
+    
+    # Empty words are the result of multiple spaces following each other
+    if word == "":
+        if top is None:
+            return (word_count + 1, leading_spaces + 1, trailing_spaces, left, right, pen, top, bottom)
+        else:
+            return (word_count + 1, leading_spaces, trailing_spaces + 1, left, right, pen, top, bottom)
+    
+    advance, word_x, word_y, word_width, word_height = word_measurement
+    if top is None:
+        return (word_count + 1, leading_spaces, 0, word_x, word_x + word_width, advance, word_y, word_y + word_height)
+    else:
+        word_start = pen + ( trailing_spaces + 1 ) * space_advance
+        return (word_count + 1, leading_spaces, 0, left, word_start + word_x + word_width, word_start + advance, \
+            min(top, word_y), max(bottom, word_y + word_height))
+
+def get_words_run_bounds(words_run: tuple, space_text_bounds) -> tuple:
+    """Returns the y, width and height of a run of words"""
+    word_count, leading_spaces, trailing_spaces, left, right, pen, top, bottom = words_run
+    
+    # Edge case - Spaces only
+    if top is None:
+        if word_count == 1:
+            return (space_text_bounds.y, space_text_bounds.width, space_text_bounds.height)
+        else:
+            return (0, max(0, word_count - 1) * space_text_bounds.width, 0)
+    
+    return (top, right - left + ( leading_spaces + trailing_spaces ) * space_text_bounds.width, bottom - top)
+
+# Markdown markers that are translated to rich text, escaped characters are matched first so they are left alone
+# Every alternative starts with a literal character, which lets the regex engine skip ahead quickly to the next marker
+md_markers_regex = re.compile(r"(\\[`*_]|``*|\*\**|__*|!!*)")
+md_rich_text_tokens = {
+    "voice_command": "<cmd@",
+    "error": "<!!",
+    "italic": "</",
+    "italic_u": "</",
+    "emphasis": "<*",
+    "emphasis_u": "<*"
+}
+md_marker_marks = {}
+
+def get_md_marker_marks(marker: str) -> tuple[str]:
+    """Returns the rich text marks that a sequence of the same markdown marker translates to"""
+    marks = md_marker_marks.get(marker)
+    if marks is None:
+        character = marker[0]
+        if character == "!":
+            marks = ("error",) * ( len(marker) // 2 )
+        elif character == "`":
+            # Code blocks are treated the same as inline code
+            marks = ("voice_command",) * ( len(marker) // 3 + len(marker) % 3 )
+        else:
+            suffix = "_u" if character == "_" else ""
+            marks = ("emphasis" + suffix,) * ( len(marker) // 2 ) + ("italic" + suffix,) * ( len(marker) % 2 )
+        md_marker_marks[marker] = marks
+    return marks
 
 def md_to_richtext_content(md_string: str):
+    """Translates markdown to rich text in a single pass over the content
+    
+    Double markers become emphasis and single markers italic, with a single marker surrounded by spaces or a backslash kept as is.
+    Every kind of marker opens and closes its style in turn across the entire content, and emphasis placed directly against
+    the other kind of emphasis marker is turned into italic instead to allow mixing them.
+    """
     sanitized_content = sanitize_md_from_unsupported_tags(md_string)
     
-    # Marks to be translated to the internal rich text delimiters
-    mark_voice_command = "-MARK-VOICE-COMMAND-"
-    mark_italic = "-MARK-ITALIC-"
-    mark_italic_u = "-MARK-U-ITALIC-"    
-    mark_emphasis = "-MARK-EMPHASIS-"
-    mark_emphasis_u = "-MARK-U-EMPHASIS-"
-    mark_error = "-MARK-ERROR-"
-    
-    # Escaped marks
-    escaped_backtick = "-ESCAPED-BACKTICK-"
-    escaped_star = "-ESCAPED-STAR-"
-    escaped_underscore = "-ESCAPED-UNDERSCORE-"
-    
-    # Keep escaped characters around
-    md_content = sanitized_content.replace("\\`", escaped_backtick).replace("\\*", escaped_star).replace("\\_", escaped_underscore)\
-        .replace(" ` ", " " + escaped_backtick + " ").replace(" * ", " " + escaped_star + " ").replace(" _ ", " " + escaped_underscore + " ")
-    content_escaped = len(md_content) != len(sanitized_content)
-    
-    # Replace all the MD markers
-    md_content = md_content.replace("!!", mark_error)            
-    md_content = md_content.replace("__", mark_emphasis_u).replace("**", mark_emphasis)
-    md_content = md_content.replace("_", mark_italic_u).replace("*", mark_italic)
-    md_content = md_content.replace(mark_emphasis + mark_emphasis_u, mark_emphasis + mark_italic_u)\
-    	.replace(mark_emphasis_u + mark_emphasis, mark_emphasis_u + mark_italic)            
-    md_content = md_content.replace("```", "`").replace("`", mark_voice_command)
-    
-    # This is probably a highly inefficient way of replacing tokens, but it should probably be atleast consistent?
-    md_content = replace_md_content_mark(md_content, mark_voice_command, "<cmd@")
-    md_content = replace_md_content_mark(md_content, mark_error, "<!!")
-    md_content = replace_md_content_mark(md_content, mark_italic, "</")
-    md_content = replace_md_content_mark(md_content, mark_italic_u, "</")
-    md_content = replace_md_content_mark(md_content, mark_emphasis, "<*")
-    md_content = replace_md_content_mark(md_content, mark_emphasis_u, "<*")
-    
-    # Only unescape the content if we have escaped
-    if content_escaped:
-        md_content = md_content.replace(escaped_backtick, "`").replace(escaped_star, "*").replace(escaped_underscore, "_")
+    # The split alternates between the content in between markers and the markers themselves
+    parts = md_markers_regex.split(sanitized_content)
+    content = [parts[0]]
+    opened_marks = {mark: False for mark in md_rich_text_tokens}
+    
+    # The last emphasis marks added, used to detect emphasis directly against the other kind of emphasis
+    previous_mark = None
+    previous_replaced_mark = None
+    
+    # Single markers surrounded by spaces are kept, but a space can only be shared between two of those if they differ
+    previous_spaced_marker = None
+    
+    for index in range(1, len(parts), 2):
+        marker = parts[index]
+        character = marker[0]
+        adjacent_to_previous = parts[index - 1] == ""
+        
+        # Escaped characters are kept without the escape
+        if character == "\\":
+            content.append(marker[1])
+            previous_mark = None
+            previous_replaced_mark = None
+        
+        elif len(marker) == 1 and character != "!" and parts[index - 1].endswith(" ") and parts[index + 1].startswith(" ") and \
+            not ( parts[index - 1] == " " and previous_spaced_marker == (index - 2, character) ):
+            content.append(character)
+            previous_spaced_marker = (index, character)
+        
+        else:
+            marks = get_md_marker_marks(marker)
+            replaced_marks = marks
+            if character == "*" or character == "_":
+                # Emphasis directly following the other kind of emphasis is made italic
+                if adjacent_to_previous:
+                    if previous_mark == "emphasis" and marks[0] == "emphasis_u":
+                        replaced_marks = ("italic_u",) + marks[1:]
+                    elif previous_replaced_mark == "emphasis_u" and marks[0] == "emphasis":
+                        replaced_marks = ("italic",) + marks[1:]
+                previous_mark = marks[-1]
+                previous_replaced_mark = replaced_marks[-1]
+            else:
+                previous_mark = None
+                previous_replaced_mark = None
             
-    return md_content
-
-def replace_md_content_mark(md_content: str, mark_to_replace: str, token: str) -> str:
-    mark_opened = False
-    token_splits = md_content.split(mark_to_replace)
-    if len(token_splits) > 0:
-        replaced_content = token_splits[0]
-        for split_token in token_splits[1:]:
-            mark_opened = not mark_opened
-            replaced_content += ( token if mark_opened else "/>" ) + split_token
-        md_content = replaced_content
-    return md_content
+            for mark in replaced_marks:
+                opened = not opened_marks[mark]
+                opened_marks[mark] = opened
+                content.append(md_rich_text_tokens[mark] if opened else "/>")
+            
+            # An uneven amount of error markers leaves a single exclamation mark
+            if character == "!" and len(marker) % 2 == 1:
+                content.append("!")
+        content.append(parts[index + 1])
+    
+    return "".join(content)
 
 def sanitize_md_from_unsupported_tags(md_content: str) -> str:
     content = []
     lines = md_content.splitlines()
-    line_added = False
+    content_added = False
     
     for line in lines:
         stripped_line = line.strip()
@@ -220,9 +464,7 @@ def sanitize_md_from_unsupported_tags(md_content: str) -> str:
         # Skip all headers
         # Skip all table rows
         # Skip all block quotes
-        if stripped_line.startswith("#") or \
-            stripped_line.startswith("|") or \
-            stripped_line.startswith(">"):
+        if stripped_line.startswith(("#", "|", ">")):
             content_added = False
             continue
 		    
@@ -244,23 +486,19 @@ def sanitize_md_from_unsupported_tags(md_content: str) -> str:
     return "\n".join(content)    
 
 def calculate_words_bounds(words: list[str], paint, space_text_bounds) -> ui.Rect:
-    current_words_joined = " ".join(words)
-    _, current_line_bounds = paint.measure_text(current_words_joined)            
+    word_measurements = get_word_measurements(paint)
+    space_advance = measure_word(paint, " ", word_measurements)[0]
+    
+    words_run = empty_words_run
+    for word in words:
+        words_run = extend_words_run(words_run, word, measure_word(paint, word, word_measurements), space_advance)
     
     # Edge case - dealing with single space
     if len(words) == 1 and words[0] == "":
-        current_line_bounds = space_text_bounds
-    else:
-        leading_spaces_count = len(current_words_joined) - len(current_words_joined.lstrip(" "))
-        trailing_spaces_count = len(current_words_joined) - len(current_words_joined.rstrip(" "))
-        extra_spaces_count = leading_spaces_count + trailing_spaces_count
-        
-        # Edge case - Spaces only
-        if len(current_words_joined.lstrip(" ")) == 0:
-            extra_spaces_count = leading_spaces_count
-        current_line_bounds.width += extra_spaces_count * space_text_bounds.width
-
-    return current_line_bounds
+        return space_text_bounds
+    
+    y, width, height = get_words_run_bounds(words_run, space_text_bounds)
+    return ui.Rect(words_run[3], y, width, height)
     
 def hex_to_ints(hex: str) -> list[int]:
     # Snippet used https://stackoverflow.com/questions/41848722/how-to-convert-hex-str-into-int-array
@@ -278,8 +516,14 @@ def lighten_hex_colour(hex: str, percent: int) -> str:
         new_hex += "0" + format(value, "x") if value <= 15 else format(value, "x")
     return new_hex
     
+speakable_string_regex = re.compile(r"([!?-_\,\.])")
+
+@lru_cache(maxsize=2048)
 def string_to_speakable_string(str: str) -> str:
-    return re.sub(r"([!?-_\,\.])", " ", str.lower()).strip()
+    return speakable_string_regex.sub(" ", str.lower()).strip()
+
+def strings_to_speakable_strings(strings: list[str]) -> list[str]:
+    return [string_to_speakable_string(string) for string in strings]
     
 def determine_screen_for_pos(pos) -> ui.Screen:
     for index, screen in enumerate(ui.screen.screens()):
@@ -304,9 +548,7 @@ def hit_test_rect(rect: ui.Rect, pos: Point2d):
         and pos.y >= rect.y and pos.y <= rect.y + rect.height
         
 def hit_test_icon(icon: HudIcon, pos: Point2d):
-    pos = numpy.array(pos)
-    icon_pos = numpy.array(icon.pos)
-    return numpy.linalg.norm(pos - icon_pos) < icon.radius
+    return hit_test_circle(icon.pos.x, icon.pos.y, icon.radius, pos.x, pos.y)
     
 def is_light_colour(red: int, green: int, blue: int) -> bool:
     luminance = (.299 * red) + (.587 * green) + (.114 * blue)
@@ -15,6 +15,7 @@ from .widgets.walkthroughpanel import HeadUpWalkthroughPanel
 from .widgets.contextmenu import HeadUpContextMenu
 from .widgets.cursortracker import HeadUpCursorTracker
 from .widgets.screenoverlay import HeadUpScreenOverlay
+from .widgets.profiler import HeadUpProfiler
 from .theme import HeadUpDisplayTheme
 from .event_dispatch import HeadUpEventDispatch
 from .configuration import hud_get_configuration
@@ -280,6 +281,7 @@ class HeadUpWidgetManager:
             self.load_widget("context_menu", "context_menu", ["*"]),
             self.load_widget("cursor_tracker", "cursor_tracker", ["*"]),
             self.load_widget("screen_overlay", "screen_overlay", ["*"]),
+            self.load_widget("profiler", "profiler", []),
         ]
         
     def load_widget(self, id: str, type: str, subscriptions = None, current_topics = None) -> BaseWidget:
@@ -304,6 +306,8 @@ class HeadUpWidgetManager:
             return self.load_choice_panel(id, self.preferences.prefs, subscriptions, current_topics)
         elif type == "walkthrough_panel":
             return self.load_walkthrough_panel(id, self.preferences.prefs, subscriptions, current_topics)
+        elif type == "profiler":
+            return self.load_profiler(id, self.preferences.prefs, subscriptions, current_topics)
             
     def load_status_bar(self, id, preferences=None, subscriptions = None, current_topics = None):
         """Load a status bar widget with the given preferences"""
@@ -344,3 +348,7 @@ class HeadUpWidgetManager:
     def load_walkthrough_panel(self, id, preferences=None, subscriptions = None, current_topics = None):
         """Load a choice panel widget with the given preferences"""
         return HeadUpWalkthroughPanel(id, preferences, self.theme, self.event_dispatch, subscriptions, current_topics)
+
+    def load_profiler(self, id, preferences=None, subscriptions = None, current_topics = None):
+        """Load a profiler widget with the given preferences"""
+        return HeadUpProfiler(id, preferences, self.theme, self.event_dispatch, subscriptions, current_topics)
@@ -4,7 +4,6 @@ from ..widget_preferences import HeadUpDisplayUserWidgetPreferences
 from ..utils import lighten_hex_colour
 from talon import skia, ui, cron
 import time
-import numpy
 from copy import copy
 
 class HeadUpAbilityBar(BaseWidget):
@@ -5,7 +5,6 @@ from ..layout_widget import LayoutWidget
 from ..widget_preferences import HeadUpDisplayUserWidgetPreferences
 from ..utils import determine_screen_for_pos, layout_rich_text, hit_test_button
 from ..content.typing import HudButton
-import numpy
 
 def close_widget(widget: BaseWidget):
     widget.disable(True)
@@ -111,7 +110,7 @@ class HeadUpContextMenu(LayoutWidget):
         else:
             # Reposition the canvas to fit the contents in the screen
             screen = determine_screen_for_pos(Point2d(self.x, self.y))
-            layout = self.layout_content(canvas, canvas.paint)
+            layout = self.update_layout(canvas, canvas.paint)
             dimensions = layout[self.page_index]["rect"]
             if dimensions is not None and screen is not None:
                 should_go_left = dimensions.x + dimensions.width >= screen.x + screen.width
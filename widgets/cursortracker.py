@@ -1,11 +1,9 @@
 from ..base_widget import BaseWidget
-from ..utils import hit_test_rect
+from ..geometry import HudRectIndex, has_moved
 from ..content.typing import HudScreenRegion
 from ..widget_preferences import HeadUpDisplayUserWidgetPreferences
 from talon import skia, ui, cron, ctrl
-from talon.types.point import Point2d
 import time
-import numpy
 
 class HeadUpCursorTracker(BaseWidget):
 
@@ -27,6 +25,8 @@ class HeadUpCursorTracker(BaseWidget):
 
     active_icon = None
     cursor_icons = []
+    icon_index = None
+    fallback_icon = None
 
     def refresh(self, new_content):
         if not self.sleep_enabled and "event" in new_content and new_content["event"].topic_type == "variable" and new_content["event"].topic == "mode":
@@ -73,6 +73,7 @@ class HeadUpCursorTracker(BaseWidget):
             new_icons = cursor_icons[:]
             soft_enable = self.cursor_icons != new_icons and len(new_icons) > 0
             self.cursor_icons = new_icons
+            self.index_icons()
         
         if self.cursor_icons:
             if soft_enable:
@@ -84,7 +85,7 @@ class HeadUpCursorTracker(BaseWidget):
         if self.canvas:
             pos = ctrl.mouse_pos()
             distance_threshold = 0.5 if self.smooth_mode else 20
-            if (self.prev_mouse_pos is None or numpy.linalg.norm(numpy.array(pos) - numpy.array(self.prev_mouse_pos)) > distance_threshold):
+            if has_moved(pos, self.prev_mouse_pos, distance_threshold):
                 self.prev_mouse_pos = pos
                 
                 if self.setup_type == "":
@@ -96,21 +97,24 @@ class HeadUpCursorTracker(BaseWidget):
                     self.determine_active_icon(pos)
                     self.canvas.freeze()
     
+    # Index the icon regions on a grid, so the active icon is found without going over every region
+    # The first icon without a region is used when the cursor is not inside any region
+    def index_icons(self):
+        self.icon_index = HudRectIndex([icon.rect for icon in self.cursor_icons])
+        self.fallback_icon = None
+        for icon in self.cursor_icons:
+            if icon.rect is None:
+                self.fallback_icon = icon
+                break
+
     # Determine the active icon based on the region the icon is in
     # If multiple regions overlap, choose the smaller more specific one
     def determine_active_icon(self, pos):
-        pos = Point2d(pos[0], pos[1])    
-        active_icon = None
-        size = None
-        for icon in self.cursor_icons:
-            if icon.rect is None and active_icon is None:
-                active_icon = icon
-            if icon.rect is not None and hit_test_rect(icon.rect, pos):            
-                if size is None or size > icon.rect.width * icon.rect.height:
-                    size = icon.rect.width * icon.rect.height
-                    active_icon = icon
-        
-        self.active_icon = active_icon
+        if self.icon_index is None:
+            self.index_icons()
+
+        icon_index = self.icon_index.query_smallest(pos[0], pos[1])
+        self.active_icon = self.fallback_icon if icon_index is None else self.cursor_icons[icon_index]
     
     def draw(self, canvas) -> bool:
         paint = self.draw_setup_mode(canvas)
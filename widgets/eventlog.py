@@ -1,11 +1,30 @@
 from user.talon_hud.base_widget import BaseWidget
 from talon import skia, ui, cron
+import heapq
+import math
 import time
-import numpy
 from ..widget_preferences import HeadUpDisplayUserWidgetPreferences, ExtraPreference
 from ..utils import layout_rich_text
 from ..content.typing import HudButton, HudLogMessage
 
+# Two character hexadecimal alpha values, so fading logs do not need to format their colours every frame
+alpha_hex_values = [format(alpha, "02x") for alpha in range(256)]
+
+# The state of a single log shown on the screen, which uses slots as a lot of them are made during busy sessions
+class HudVisualLog:
+    __slots__ = ("show_on", "ttl", "id", "type", "message", "animation_tick", "animation_goal", "render", "render_key")
+    
+    def __init__(self, show_on: float, ttl: float, id: float, type: str, message: str, animation_tick: int = 0, animation_goal: int = 0):
+        self.show_on = show_on
+        self.ttl = ttl
+        self.id = id
+        self.type = type
+        self.message = message
+        self.animation_tick = animation_tick
+        self.animation_goal = animation_goal
+        self.render = None # The laid out message and resolved colours, kept until the render key changes
+        self.render_key = None
+
 class HeadUpEventLogPreferences(HeadUpDisplayUserWidgetPreferences):
     extra_preferences = [ExtraPreference("ttl_duration_seconds", str, float)]
 
@@ -14,6 +33,8 @@ class HeadUpEventLog(BaseWidget):
     allowed_setup_options = ["position", "dimension", "limit", "font_size"]
     
     visual_logs = []
+    visual_log_positions = {} # The position of the first visual log of every log id, used to find the visual logs to revise without going over all of them
+    visual_log_offset = 0 # Subtracted from the stored positions, so logs can be added in front without moving every stored position
     visual_log_length = 0
     
     # New content topic types
@@ -37,10 +58,17 @@ class HeadUpEventLog(BaseWidget):
     ttl_animation_duration_seconds = 1.0
     ttl_delayed_seconds = 0.3
     ttl_duration_seconds = 9
-    ttl_poller = None
+    
+    # The moments at which visual logs need to start fading or need to be removed, as a heap of deadline, sequence and visual log
+    # Only a single cron job is scheduled for the earliest deadline, so idle logs do not cause any wake ups
+    ttl_deadlines = None
+    ttl_sequence = 0
+    ttl_job = None
+    ttl_job_deadline = 0
     
     infinite_ttl = 1000000 # One million seconds is effectively eternal from a UX perspective, as it takes 12 days
     locked = False
+    theme_version = 0 # Increased on every theme load, so the renders kept on the visual logs are made again with the new theme
     
     def update_buttons(self):
         buttons = []
@@ -53,67 +81,115 @@ class HeadUpEventLog(BaseWidget):
         buttons.append(HudButton("", "Clear logs", ui.Rect(0,0,0,0), lambda widget: widget.clear_logs()))
         self.buttons = buttons
     
+    def load_theme_values(self):
+        self.theme_version += 1
+
     def load_extra_preferences(self):
         # Set and reset TTL on theme change
         self.set_log_ttl()
                 
     def append_log(self, log: HudLogMessage):
         if self.soft_enabled and self.enabled and len(log.message) > 0 and not self.locked:
-            visual_log = {
-                "show_on": log.time,
-                "ttl": log.time + self.ttl_duration_seconds, 
-                "id": log.time,
-                "type": log.type, 
-                "message": log.message, 
-                "animation_tick": self.ttl_animation_max_duration if self.show_animations else 0, 
-                "animation_goal": 0
-            }
+            visual_log = HudVisualLog(log.time, log.time + self.ttl_duration_seconds, log.time, log.type, log.message,
+                self.ttl_animation_max_duration if self.show_animations else 0)
             
             if (self.expand_direction == "up"):
+                self.visual_log_offset -= 1
                 self.visual_logs.insert(0, visual_log)
+                self.visual_log_positions[visual_log.id] = self.visual_log_offset
             else:
+                self.visual_log_positions.setdefault(visual_log.id, self.visual_log_offset + len(self.visual_logs))
                 self.visual_logs.append(visual_log)
             self.poll_ttl_visuals()
-            
-            # Poll for TTL expiration at half the rate of the animation duration - It"s not mission critical to make the logs disappear at exactly the right time
-            if self.ttl_poller is None:
-                self.ttl_poller = cron.interval(str(int(self.ttl_animation_duration_seconds / 2 * 1000)) +"ms", self.poll_ttl_visuals)
+            self.schedule_ttl(visual_log)
+            self.schedule_next_ttl_poll()
 
     def revise_logs(self, logs):
         if self.soft_enabled and self.enabled and len(logs) > 0:
             for log_index, log in enumerate(logs):                
-                revise_index = -1
-                for index, visual_log in enumerate(self.visual_logs):
-                    if visual_log["id"] == log.time:
-                        revise_index = index
-                        break
-            
+                revise_index = self.get_visual_log_position(log.time)
                 if revise_index != -1:
-                    self.visual_logs.pop(revise_index)
+                    revised_log = self.visual_logs.pop(revise_index)
+                    del self.visual_log_positions[revised_log.id]
                     new_logs = []
                     for index, new_log in enumerate(logs):
                         visual_delay = self.ttl_delayed_seconds * index
                         
-                        visual_log = {
-                            "show_on": new_log.time + visual_delay,
-                            "ttl": new_log.time + self.ttl_duration_seconds + visual_delay, 
-                            "id": new_log.time,
-                            "type": new_log.type, 
-                            "message": new_log.message, 
-                            "animation_tick": self.ttl_animation_max_duration if self.show_animations else 0, 
-                            "animation_goal": 0
-                        }
+                        visual_log = HudVisualLog(new_log.time + visual_delay, new_log.time + self.ttl_duration_seconds + visual_delay, 
+                            new_log.time, new_log.type, new_log.message, self.ttl_animation_max_duration if self.show_animations else 0)
                         
                         if (self.expand_direction == "up"):
                             self.visual_logs.insert(revise_index, visual_log)
                         else:
                             self.visual_logs.append(visual_log)
+                        self.schedule_ttl(visual_log)
+                    self.index_revised_visual_logs(revised_log, revise_index, len(logs))
                 else:
                     self.append_log(log)
-                
-            # Poll for TTL expiration at half the rate of the animation duration - It"s not mission critical to make the logs disappear at exactly the right time
-            if self.ttl_poller is None:
-                self.ttl_poller = cron.interval(str(int(self.ttl_animation_duration_seconds / 2 * 1000)) +"ms", self.poll_ttl_visuals)
+            self.schedule_next_ttl_poll()
+
+    # Remove the matching visual logs in a single sweep, moving the remaining logs forward in place instead of building a new list
+    def remove_visual_logs(self, should_remove):
+        kept_count = 0
+        for visual_log in self.visual_logs:
+            if not should_remove(visual_log):
+                self.visual_logs[kept_count] = visual_log
+                kept_count += 1
+        
+        if kept_count != len(self.visual_logs):
+            del self.visual_logs[kept_count:]
+            self.index_visual_logs()
+
+    def get_visual_log_position(self, id: float) -> int:
+        return self.visual_log_positions[id] - self.visual_log_offset if id in self.visual_log_positions else -1
+
+    # Rebuild the positions of all the visual logs by their id, where the first visual log with an id is kept
+    def index_visual_logs(self):
+        self.visual_log_positions = {}
+        self.visual_log_offset = 0
+        for position in range(len(self.visual_logs) - 1, -1, -1):
+            self.visual_log_positions[self.visual_logs[position].id] = position
+
+    # Update the positions after a visual log has been replaced by the given amount of revised visual logs
+    # Only the positions of the inserted visual logs and the visual logs that moved because of them are updated
+    def index_revised_visual_logs(self, revised_log: HudVisualLog, revise_index: int, inserted_count: int):
+        if self.expand_direction == "up":
+            inserted_index = revise_index
+            moved_start_index = revise_index + inserted_count
+            moved_end_index = len(self.visual_logs)
+            moved_by = inserted_count - 1
+        else:
+            inserted_index = len(self.visual_logs) - inserted_count
+            moved_start_index = revise_index
+            moved_end_index = inserted_index
+            moved_by = -1
+
+        # When the newest log at the front is revised, every log behind it moves by the same amount, which the offset covers
+        if self.expand_direction == "up" and revise_index == 0:
+            self.visual_log_offset -= moved_by
+            moved_start_index = moved_end_index
+        elif moved_by == 0:
+            moved_start_index = moved_end_index
+            
+        # Going from the back to the front, so a moved position is never mistaken for the previous position of another visual log
+        # The revised log might share its id with a visual log that moved, which then becomes the first visual log with that id
+        for position in range(moved_end_index - 1, moved_start_index - 1, -1):
+            id = self.visual_logs[position].id
+            if id == revised_log.id or self.get_visual_log_position(id) == position - moved_by:
+                self.visual_log_positions[id] = self.visual_log_offset + position
+
+        for position in range(inserted_index + inserted_count - 1, inserted_index - 1, -1):
+            id = self.visual_logs[position].id
+            current_position = self.get_visual_log_position(id)
+            if current_position == -1 or current_position >= position:
+                self.visual_log_positions[id] = self.visual_log_offset + position
+
+        # Without moved visual logs to go over, a visual log behind the revised logs might still share its id
+        if revised_log.id not in self.visual_log_positions:
+            for position in range(inserted_index + inserted_count, len(self.visual_logs)):
+                if self.visual_logs[position].id == revised_log.id:
+                    self.visual_log_positions[revised_log.id] = self.visual_log_offset + position
+                    break
   
     # Clean out all the logs still visible on the screen
     def disable(self, persisted=False):
@@ -121,8 +197,7 @@ class HeadUpEventLog(BaseWidget):
             self.soft_disable()
             super().disable(persisted)
             
-            cron.cancel(self.ttl_poller)
-            self.ttl_poller = None
+            self.cancel_ttl_polls()
             
     def enable(self, persisted=False):
         if not self.enabled:
@@ -132,6 +207,9 @@ class HeadUpEventLog(BaseWidget):
     def clear(self):
         super().clear()
         self.visual_logs = []
+        self.visual_log_positions = {}
+        self.visual_log_offset = 0
+        self.cancel_ttl_polls()
 
     # Clean out all the logs still visible on the screen    
     def soft_disable(self):
@@ -141,13 +219,17 @@ class HeadUpEventLog(BaseWidget):
         # Set the TTL to all non-expired messages            
         if self.show_animations:
             for visual_log in self.visual_logs:
-                if visual_log["ttl"] - self.ttl_animation_duration_seconds > current_time and visual_log["animation_tick"] >= 0:
-                    visual_log["ttl"] = current_time + self.ttl_animation_duration_seconds
-                    visual_log["animation_tick"] = -1
-                    visual_log["animation_goal"] = -self.ttl_animation_max_duration
+                if visual_log.ttl - self.ttl_animation_duration_seconds > current_time and visual_log.animation_tick >= 0:
+                    visual_log.ttl = current_time + self.ttl_animation_duration_seconds
+                    visual_log.animation_tick = -1
+                    visual_log.animation_goal = -self.ttl_animation_max_duration
+            self.reschedule_ttls()
         # Just clear all the logs if not animated
         else:
             self.visual_logs = []
+            self.visual_log_positions = {}
+            self.visual_log_offset = 0
+            self.cancel_ttl_polls()
 
     # Make sure the custom operations do not trigger an update
     def content_handler(self, event) -> bool:
@@ -168,7 +250,12 @@ class HeadUpEventLog(BaseWidget):
         
         if "event" in new_content:
             if new_content["event"].operation == "append":
-                self.append_log(new_content["event"].content)
+                # Batched content events can contain multiple appended logs
+                if isinstance(new_content["event"].content, list):
+                    for log in new_content["event"].content:
+                        self.append_log(log)
+                else:
+                    self.append_log(new_content["event"].content)
             elif new_content["event"].operation == "patch":
                 self.revise_logs(new_content["event"].content)
         self.update_buttons()
@@ -188,7 +275,8 @@ class HeadUpEventLog(BaseWidget):
         
         self.ttl_duration_seconds = self.ttl_duration_seconds if self.ttl_duration_seconds != -1 else self.infinite_ttl
         for visual_log in self.visual_logs:
-            visual_log["ttl"] = visual_log["ttl"] - previous_duration + self.ttl_duration_seconds
+            visual_log.ttl = visual_log.ttl - previous_duration + self.ttl_duration_seconds
+        self.reschedule_ttls()
         
         if self.ttl_duration_seconds != self.infinite_ttl and self.locked:
             self.locked = False
@@ -198,35 +286,96 @@ class HeadUpEventLog(BaseWidget):
         
     def clear_logs(self):
         self.visual_logs = []
+        self.visual_log_positions = {}
+        self.visual_log_offset = 0
+        self.cancel_ttl_polls()
 
     def poll_ttl_visuals(self):
         current_time = time.monotonic()
         
         resume_canvas = self.visual_log_length != len(self.visual_logs)
         for visual_log in self.visual_logs:
-            if self.show_animations and visual_log["ttl"] - self.ttl_animation_duration_seconds <= current_time and visual_log["animation_tick"] >= 0:
-                visual_log["animation_tick"] = -1
-                visual_log["animation_goal"] = -self.ttl_animation_max_duration
+            if self.show_animations and visual_log.ttl - self.ttl_animation_duration_seconds <= current_time and visual_log.animation_tick >= 0:
+                visual_log.animation_tick = -1
+                visual_log.animation_goal = -self.ttl_animation_max_duration
                 resume_canvas = True
+                self.schedule_ttl(visual_log)
         
         # Clear the logs marked for deletion
-        self.visual_logs = [visual_log for visual_log in self.visual_logs if visual_log["ttl"] > current_time ]
+        self.remove_visual_logs(lambda visual_log: visual_log.ttl <= current_time)
 
         # Only start drawing when changes have been made
         if resume_canvas and self.enabled:
             self.canvas.resume()
 
         self.visual_log_length = len(self.visual_logs)
-        if self.visual_log_length == 0 and self.ttl_poller is not None:
+        if self.visual_log_length == 0 and self.ttl_job is not None:
             self.canvas.resume()
-            cron.cancel(self.ttl_poller)
-            self.ttl_poller = None
+            self.cancel_ttl_polls()
+
+    # The moment a visual log needs to start fading out, or needs to be removed when it is already fading or not animated
+    def get_ttl_deadline(self, visual_log) -> float:
+        if self.show_animations and visual_log.animation_tick >= 0:
+            return visual_log.ttl - self.ttl_animation_duration_seconds
+        else:
+            return visual_log.ttl
+
+    def schedule_ttl(self, visual_log):
+        deadline = self.get_ttl_deadline(visual_log)
+        
+        # Logs that are kept alive never expire, so they do not need a deadline at all
+        if deadline - time.monotonic() < self.infinite_ttl / 2:
+            if self.ttl_deadlines is None:
+                self.ttl_deadlines = []
+            self.ttl_sequence += 1
+            heapq.heappush(self.ttl_deadlines, (deadline, self.ttl_sequence, visual_log))
+
+    # Rebuild the deadlines after the TTL of the visual logs has changed
+    def reschedule_ttls(self):
+        self.ttl_deadlines = []
+        for visual_log in self.visual_logs:
+            self.schedule_ttl(visual_log)
+        if self.ttl_job is not None:
+            cron.cancel(self.ttl_job)
+            self.ttl_job = None
+        self.schedule_next_ttl_poll()
+
+    # Schedule a single poll at the earliest deadline, skipping the deadlines that have been replaced by newer ones
+    def schedule_next_ttl_poll(self):
+        while self.ttl_deadlines and self.get_ttl_deadline(self.ttl_deadlines[0][2]) != self.ttl_deadlines[0][0]:
+            heapq.heappop(self.ttl_deadlines)
+        if not self.ttl_deadlines:
+            return
+        
+        deadline = self.ttl_deadlines[0][0]
+        if self.ttl_job is not None:
+            if self.ttl_job_deadline <= deadline:
+                return
+            cron.cancel(self.ttl_job)
+        
+        self.ttl_job_deadline = deadline
+        self.ttl_job = cron.after(str(max(1, math.ceil((deadline - time.monotonic()) * 1000))) + "ms", self.poll_ttl_deadlines)
+    
+    def poll_ttl_deadlines(self):
+        self.ttl_job = None
+        current_time = time.monotonic()
+        while self.ttl_deadlines and self.ttl_deadlines[0][0] <= current_time:
+            heapq.heappop(self.ttl_deadlines)
+        
+        self.poll_ttl_visuals()
+        self.schedule_next_ttl_poll()
+
+    def cancel_ttl_polls(self):
+        if self.ttl_job is not None:
+            cron.cancel(self.ttl_job)
+            self.ttl_job = None
+        self.ttl_deadlines = []
 
     def draw(self, canvas) -> bool:
         paint = self.draw_setup_mode(canvas)
             
         # Clear logs that are no longer visible    
-        self.visual_logs = [visual_log for visual_log in self.visual_logs if not (visual_log["animation_tick"] < 0 and visual_log["animation_tick"] == visual_log["animation_goal"]) ]
+        self.remove_visual_logs(lambda visual_log: visual_log.animation_tick < 0 and visual_log.animation_tick == visual_log.animation_goal)
         self.visual_log_length = len(self.visual_logs)
         
         if (self.visual_log_length > 0):
@@ -234,7 +383,6 @@ class HeadUpEventLog(BaseWidget):
             continue_drawing = False
 
             default_background_colour = self.theme.get_colour("event_log_background", "F5F5F5")
-            background_colour = default_background_colour
             log_margin = self.theme.get_int_value("event_log_between_margin", 10)
             text_padding = self.theme.get_int_value("event_log_horizontal_padding", 8)
             vertical_text_padding = self.theme.get_int_value("event_log_vertical_padding", 4)
@@ -243,32 +391,12 @@ class HeadUpEventLog(BaseWidget):
             current_y = self.y if self.expand_direction == "down" else self.y + self.height
             cut_off_index = 0
             for index, visual_log in enumerate(self.visual_logs):
-                if visual_log["show_on"] > time.monotonic():
+                if visual_log.show_on > time.monotonic():
                     continue_drawing = True
                     continue
             
-                # Split up the text into lines if there are linebreaks
-                # And calculate their dimensions
-                lines = layout_rich_text(paint, visual_log["message"], self.limit_width - text_padding * 2, self.limit_height)
-                total_text_width = 0
-                total_text_height = 0
-                current_line_width = 0
-                line_count = 0
-                current_line_height = 0
-                for line in lines:
-                    if line.x == 0:
-                        line_count += 1
-                        current_line_width = line.width
-                        current_line_height = line.height
-                        total_text_height += current_line_height                        
-                    else:
-                        current_line_width += line.width
-                        total_text_height -= current_line_height
-                        current_line_height = max(current_line_height, line.height)
-                        total_text_height += current_line_height
-                    total_text_width = max( total_text_width, current_line_width )
-                
-                log_height = vertical_text_padding * 2 + total_text_height
+                render = self.get_log_render(visual_log, paint, text_padding, vertical_text_padding, default_background_colour)
+                log_height = render["log_height"]
             
                 if self.expand_direction == "down":                    
                     offset = 0 if index == 0 else log_margin + log_height
@@ -276,7 +404,7 @@ class HeadUpEventLog(BaseWidget):
                     
                     # Clear visual logs that should no longer be visible
                     if current_y + log_height > self.limit_y + self.limit_height:
-                        self.visual_logs[cut_off_index]["ttl"] = time.monotonic()
+                        self.cut_off_visual_log(self.visual_logs[cut_off_index])
                         cut_off_index += 1
                         continue
                 else:
@@ -285,59 +413,101 @@ class HeadUpEventLog(BaseWidget):
                     
                     # Clear the first visual logs that should no longer be visible
                     if current_y < self.limit_y:
-                        visual_log["ttl"] = time.monotonic()
+                        self.cut_off_visual_log(visual_log)
                         continue
                 
-                text_width = total_text_width
+                text_width = render["text_width"]
                 element_width = text_padding * 2 + text_width
 
                 text_x = self.x + text_padding if self.alignment == "left" else self.x + self.width - text_padding - text_width
                 element_x = text_x - text_padding
                 
-                # Fade the opacity of the message
-                opacity = 1.0 if visual_log["animation_tick"] >= 0 else 0.0
-                if (visual_log["animation_tick"] != visual_log["animation_goal"] ):
+                # Fade the opacity of the message, only the alpha of the rendered colours changes during the animation
+                opacity = 1.0 if visual_log.animation_tick >= 0 else 0.0
+                if (visual_log.animation_tick != visual_log.animation_goal ):
                     continue_drawing = True
-                    if visual_log["animation_tick"] < visual_log["animation_goal"]:
-                        visual_log["animation_tick"] = visual_log["animation_tick"] + 1
+                    if visual_log.animation_tick < visual_log.animation_goal:
+                        visual_log.animation_tick = visual_log.animation_tick + 1
                     else:
-                        visual_log["animation_tick"] = visual_log["animation_tick"] - 1
-                    opacity = ( self.ttl_animation_max_duration - abs(visual_log["animation_tick"]) ) / self.ttl_animation_max_duration
+                        visual_log.animation_tick = visual_log.animation_tick - 1
+                    opacity = ( self.ttl_animation_max_duration - abs(visual_log.animation_tick) ) / self.ttl_animation_max_duration
                 
-                max_opacity = self.theme.get_opacity("event_log_opacity")
-                text_colour = self.theme.get_colour("event_log_text_colour", self.theme.get_colour("text_colour") )                
-                if visual_log["type"] not in ["event", "success", "error", "warning"]:
-                    background_colour = default_background_colour
-                else:
-                    if visual_log["type"] == "event":
-                        background_colour = self.theme.get_colour("info_colour", "30AD9E")
-                    elif visual_log["type"] == "error":
-                        background_colour = self.theme.get_colour("error_colour", "AA0000")
-                    elif visual_log["type"] == "warning":
-                        background_colour = self.theme.get_colour("warning_colour", "F75B00")
-                    elif visual_log["type"] == "success":
-                        background_colour = self.theme.get_colour("success_colour", "00CC00")
-                    max_opacity = 255
-                    text_colour = "FFFFFF"
-                opacity_int = min(max_opacity, int(max_opacity * opacity))
-                opacity_hex = hex(opacity_int)[-2:] if opacity_int > 15 else "0" + hex(opacity_int)[-1:]
-                
-                paint.color = background_colour + opacity_hex
+                paint.color = render["background_colour"] + alpha_hex_values[min(render["max_opacity"], int(render["max_opacity"] * opacity))]
                 self.draw_background(canvas, element_x, current_y, element_width, log_height, paint)
                 
                 # Draw text line by line
-                max_text_opacity = self.theme.get_opacity("event_log_text_opacity", 1.0)
-                opacity_int = min(max_text_opacity, int(max_text_opacity * opacity))
-                opacity_hex = hex(opacity_int)[-2:] if opacity_int > 15 else "0" + hex(opacity_int)[-1:]
-                paint.color = text_colour + opacity_hex
-                
-                line_height = total_text_height / line_count#paint.textsize# total_text_height / len(lines)b
-                self.draw_rich_text(canvas, paint, lines, text_x, current_y + vertical_text_padding * 2, line_height )
+                paint.color = render["text_colour"] + alpha_hex_values[min(render["max_text_opacity"], int(render["max_text_opacity"] * opacity))]
+                self.draw_rich_text(canvas, paint, render["lines"], text_x, current_y + vertical_text_padding * 2, render["line_height"] )
                 
             return continue_drawing
         else:
             return False
         
+    # Expire a visual log that no longer fits right away, unless it has already expired
+    def cut_off_visual_log(self, visual_log):
+        current_time = time.monotonic()
+        if visual_log.ttl > current_time:
+            visual_log.ttl = current_time
+            self.schedule_ttl(visual_log)
+            self.schedule_next_ttl_poll()
+
+    # Lay out the message of a log and determine its colours, which are kept on the visual log
+    # Until the width, the font size or the theme changes, so every frame after the first only draws
+    def get_log_render(self, visual_log, paint, text_padding, vertical_text_padding, default_background_colour) -> dict:
+        render_key = (self.limit_width, self.font_size, self.theme_version)
+        if visual_log.render_key == render_key:
+            return visual_log.render
+    
+        # Split up the text into lines if there are linebreaks
+        # And calculate their dimensions
+        lines = layout_rich_text(paint, visual_log.message, self.limit_width - text_padding * 2, self.limit_height)
+        total_text_width = 0
+        total_text_height = 0
+        current_line_width = 0
+        line_count = 0
+        current_line_height = 0
+        for line in lines:
+            if line.x == 0:
+                line_count += 1
+                current_line_width = line.width
+                current_line_height = line.height
+                total_text_height += current_line_height                        
+            else:
+                current_line_width += line.width
+                total_text_height -= current_line_height
+                current_line_height = max(current_line_height, line.height)
+                total_text_height += current_line_height
+            total_text_width = max( total_text_width, current_line_width )
+        
+        max_opacity = self.theme.get_opacity("event_log_opacity")
+        text_colour = self.theme.get_colour("event_log_text_colour", self.theme.get_colour("text_colour") )                
+        if visual_log.type not in ["event", "success", "error", "warning"]:
+            background_colour = default_background_colour
+        else:
+            if visual_log.type == "event":
+                background_colour = self.theme.get_colour("info_colour", "30AD9E")
+            elif visual_log.type == "error":
+                background_colour = self.theme.get_colour("error_colour", "AA0000")
+            elif visual_log.type == "warning":
+                background_colour = self.theme.get_colour("warning_colour", "F75B00")
+            elif visual_log.type == "success":
+                background_colour = self.theme.get_colour("success_colour", "00CC00")
+            max_opacity = 255
+            text_colour = "FFFFFF"
+        
+        visual_log.render = {
+            "lines": lines,
+            "text_width": total_text_width,
+            "log_height": vertical_text_padding * 2 + total_text_height,
+            "line_height": total_text_height / line_count if line_count > 0 else 0,
+            "background_colour": background_colour,
+            "text_colour": text_colour,
+            "max_opacity": max_opacity,
+            "max_text_opacity": self.theme.get_opacity("event_log_text_opacity", 1.0)
+        }
+        visual_log.render_key = render_key
+        return visual_log.render
+        
     def draw_animation(self, canvas, animation_tick):
         if self.enabled:
             return len(self.visual_logs) > 0
@@ -0,0 +1,73 @@
+from ..base_widget import BaseWidget
+from ..widget_preferences import HeadUpDisplayUserWidgetPreferences
+from ..performance import frame_profiler
+from talon import skia, ui, cron
+
+class HeadUpProfiler(BaseWidget):
+
+    allowed_setup_options = ["position", "dimension", "limit", "font_size"]
+
+    # By default - This widget sits in the top left corner, out of the way of the other widgets
+    preferences = HeadUpDisplayUserWidgetPreferences(type="profiler", x=50, y=50, width=450, height=100, limit_x=50, limit_y=50, limit_width=450, limit_height=400, enabled=False, alignment="left", expand_direction="down", font_size=14)
+    refresh_poller = None
+
+    # This widget does not show any content, only the frame timings of the other widgets
+    topic_types = []
+    current_topics = []
+    subscriptions = []
+
+    def enable(self, persisted=False):
+        if not self.enabled:
+            super().enable(persisted)
+            frame_profiler.enable()
+            self.refresh_poller = cron.interval("500ms", self.refresh_profile)
+
+    def disable(self, persisted=False):
+        if self.enabled:
+            cron.cancel(self.refresh_poller)
+            self.refresh_poller = None
+            frame_profiler.disable()
+            super().disable(persisted)
+
+    def refresh_profile(self):
+        if self.enabled and self.canvas:
+            self.canvas.resume()
+
+    def draw_animation(self, canvas, animation_tick):
+        if self.enabled:
+            return self.draw(canvas)
+        else:
+            return False
+
+    def draw(self, canvas) -> bool:
+        paint = self.draw_setup_mode(canvas)
+        paint.textsize = self.font_size
+        paint.font.embolden = False
+        paint.font.skew_x = 0
+
+        lines = ["Widget - draw ms avg / max - fps - resumed / paused s"]
+        stats = frame_profiler.get_stats()
+        for widget_id in sorted(stats.keys()):
+            widget_stats = stats[widget_id]
+            lines.append(widget_id + ( " *" if widget_stats["resumed"] else "" ) + " - " + \
+                "{:.2f}".format(widget_stats["mean_draw_ms"]) + " / " + "{:.2f}".format(widget_stats["max_draw_ms"]) + " - " + \
+                "{:.0f}".format(widget_stats["fps"]) + " - " + \
+                "{:.1f}".format(widget_stats["resumed_seconds"]) + " / " + "{:.1f}".format(widget_stats["paused_seconds"]))
+
+        padding = 8
+        line_height = self.font_size * 1.5
+        height = min(max(self.height, len(lines) * line_height + padding * 2), self.limit_height)
+        y = self.y if self.expand_direction == "down" else self.y + self.height - height
+
+        paint.color = self.theme.get_colour("text_box_background", "F5F5F5")
+        rect = ui.Rect(self.x, y, self.limit_width, height)
+        canvas.draw_rrect(skia.RoundRect.from_rect(rect, x=5, y=5))
+
+        paint.color = self.theme.get_colour("text_colour")
+        max_lines = int((height - padding * 2) / line_height)
+        for index, line in enumerate(lines[:max_lines]):
+            canvas.draw_text(line, self.x + padding, y + padding + line_height * index + line_height / 2 + self.font_size / 3)
+
+        # The canvas is resumed periodically by the refresh poller instead of continuously
+        # So the profiler does not inflate its own frame timings
+        return False
@@ -1,11 +1,11 @@
 from ..base_widget import BaseWidget
-from ..utils import layout_rich_text, hit_test_rect, is_light_colour, hex_to_ints
+from ..utils import layout_rich_text, is_light_colour, hex_to_ints
+from ..geometry import HudRectIndex, has_moved
 from ..content.typing import HudScreenRegion
 from ..widget_preferences import HeadUpDisplayUserWidgetPreferences
 from talon import skia, ui, cron, ctrl, canvas
 from talon.types.point import Point2d
 import time
-import numpy
 
 class HeadUpScreenOverlay(BaseWidget):
 
@@ -28,6 +28,9 @@ class HeadUpScreenOverlay(BaseWidget):
     regions = None
     active_regions = None
     canvases = None
+    region_index = None
+    always_active_indices = None
+    hidden_on_hover_indices = None
     
     def __init__(self, id, preferences_dict, theme, event_dispatch, subscriptions = None, current_topics = None):
         super().__init__(id, preferences_dict, theme, event_dispatch, subscriptions, current_topics)
@@ -89,9 +92,11 @@ class HeadUpScreenOverlay(BaseWidget):
             self.mouse_poller = None
             self.regions = []
             self.active_regions = []
+            self.region_index = None
 
     def update_regions(self):
         self.active_regions = []
+        self.region_index = None
         if not self.enabled:
             self.regions = self.content.get_topic("screen_regions")
             return
@@ -212,30 +217,47 @@ class HeadUpScreenOverlay(BaseWidget):
         if self.enabled:
             pos = ctrl.mouse_pos()
             distance_threshold = 0.5 if self.smooth_mode else 20
-            if (self.prev_mouse_pos is None or numpy.linalg.norm(numpy.array(pos) - numpy.array(self.prev_mouse_pos)) > distance_threshold):
+            if has_moved(pos, self.prev_mouse_pos, distance_threshold):
                 self.prev_mouse_pos = pos
                 self.determine_active_regions(pos)
     
+    # Index the hoverable regions on a grid, so the hovered regions are found without going over every region
+    # Regions that hide on hover are indexed by their canvas, so the index is rebuilt when the regions or the layout change
+    def index_regions(self):
+        rects = []
+        self.always_active_indices = []
+        self.hidden_on_hover_indices = []
+        for index, region in enumerate(self.regions):
+            rect = None
+            if not region.hover_visibility or region.rect is None:
+                self.always_active_indices.append(index)
+            elif region.hover_visibility == 1:
+                rect = region.rect
+            elif region.hover_visibility == -1:
+                rect = self.align_region_canvas_rect(region)
+                self.hidden_on_hover_indices.append(index)
+            rects.append(rect)
+        self.region_index = HudRectIndex(rects)
+
     # Determine the active regions based on the region the icon is in
     def determine_active_regions(self, pos):
-        pos = Point2d(pos[0], pos[1])
-        active_regions = []
-        size = None
-        for region in self.regions:
-            if not region.hover_visibility:
-                active_regions.append(region)
-            else:
-                if region.rect is None:
-                    active_regions.append(region)
-                elif region.rect is not None and region.hover_visibility == 1 and hit_test_rect(region.rect, pos):
-                    active_regions.append(region)
-                # For hover visibility -1 , we want the region canvas to be translucent when hovered
-                # So it doesn"t occlude content - But otherwise it should be visible
-                elif region.hover_visibility == -1:
-                    rect = self.align_region_canvas_rect(region)
-                    if not hit_test_rect(rect, pos):
-                        active_regions.append(region)
-                        
+        if self.region_index is None:
+            self.index_regions()
+
+        hovered_indices = self.region_index.query_point(pos[0], pos[1])
+        active_indices = self.always_active_indices[:]
+        for index in hovered_indices:
+            if self.regions[index].hover_visibility == 1:
+                active_indices.append(index)
+
+        # For hover visibility -1 , we want the region canvas to be translucent when hovered
+        # So it doesn"t occlude content - But otherwise it should be visible
+        for index in self.hidden_on_hover_indices:
+            if index not in hovered_indices:
+                active_indices.append(index)
+        
+        active_indices.sort()
+        active_regions = [self.regions[index] for index in active_indices]
         if self.active_regions != active_regions:
             self.active_regions = active_regions
             for canvas_reference in self.canvases:
@@ -389,6 +411,7 @@ class HeadUpScreenOverlay(BaseWidget):
                 self.preferences.height = self.limit_height
                 self.preferences.limit_width = self.limit_width
                 self.preferences.limit_height = self.limit_height
+                self.region_index = None
             elif (self.setup_type == "font_size" ):
                 self.preferences.font_size = self.font_size
 
@@ -404,6 +427,7 @@ class HeadUpScreenOverlay(BaseWidget):
             self.drag_position = []        
             if (self.setup_type != ""):
                 self.load({}, False)
+                self.region_index = None
                 
                 self.setup_type = ""                
                 if self.canvas:
@@ -466,6 +490,7 @@ class HeadUpScreenOverlay(BaseWidget):
         dict = {}
         dict[self.id + "_" + preference] = value
         self.load(dict, False)
+        self.region_index = None
         if self.enabled:
             for canvas_reference in self.canvases:
                 canvas_rect = self.align_region_canvas_rect(canvas_reference["region"])
@@ -480,6 +505,7 @@ class HeadUpScreenOverlay(BaseWidget):
         # Copied over from base widget to reflect the no-canvas state of this widget    
         self.theme = theme
         self.load_theme_values()
+        self.region_index = None
         if self.enabled:
             if self.canvas:
                 self.canvas.freeze()
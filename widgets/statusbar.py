@@ -1,10 +1,10 @@
 from ..base_widget import BaseWidget
 from ..utils import linear_gradient
+from ..geometry import hit_test_circle
 from ..widget_preferences import HeadUpDisplayUserWidgetPreferences
 from ..content.typing import HudButton, HudStatusOption, HudStatusIcon
 from talon import skia, ui, Module, cron, actions
 import time
-import numpy
 
 class HeadUpStatusBar(BaseWidget):
 
@@ -73,12 +73,12 @@ class HeadUpStatusBar(BaseWidget):
         self.icons = self.content.get_topic("status_icons")
         
     def on_mouse(self, event):
-        pos = numpy.array(event.gpos)
+        pos = event.gpos
         
         # Hit detection of buttons        
         hover_index = -1
         for index, icon in enumerate(self.icon_positions):
-            if icon["icon"].callback and (numpy.linalg.norm(pos - numpy.array([icon["center_x"], icon["center_y"]])) < icon["radius"]):
+            if icon["icon"].callback and hit_test_circle(icon["center_x"], icon["center_y"], icon["radius"], pos.x, pos.y):
                 hover_index = index
                 break
         
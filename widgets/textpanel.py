@@ -1,7 +1,7 @@
 from talon import skia, ui, cron, actions, clip
 from ..layout_widget import LayoutWidget
 from ..widget_preferences import HeadUpDisplayUserWidgetPreferences
-from ..utils import layout_rich_text, remove_tokens_from_rich_text, linear_gradient, hit_test_icon
+from ..utils import layout_rich_text, layout_rich_text_incrementally, remove_tokens_from_rich_text, linear_gradient, hit_test_icon
 from ..content.typing import HudRichTextLine, HudPanelContent, HudButton, HudIcon
 from talon.types.point import Point2d
 
@@ -55,6 +55,11 @@ class HeadUpTextPanel(LayoutWidget):
 
     panel_content = HudPanelContent("", "", [""], [], 0, False)    
     animation_max_duration = 60
+    
+    # Kept around to only lay out and paginate the changed content when the content is appended to
+    content_layout = None
+    pagination_key = None
+    page_checkpoints = []
         
     def copy_contents(self):
         clip.set_text(remove_tokens_from_rich_text(self.panel_content.content[0]))
@@ -136,7 +141,9 @@ class HeadUpTextPanel(LayoutWidget):
         """Calculates the width and the height of the content"""
         header_title = self.panel_content.title if self.panel_content.title != "" else self.id
         header_text = layout_rich_text(paint, header_title, self.limit_width - icon_size, self.limit_height)
-        content_text = [] if self.minimized else layout_rich_text(paint, self.panel_content.content[0], layout_width, self.limit_height)
+        if not self.minimized:
+            self.content_layout = layout_rich_text_incrementally(paint, self.panel_content.content[0], layout_width, self.content_layout)
+        content_text = [] if self.minimized else self.content_layout.rich_text
         
         layout_pages = []
         
@@ -163,7 +170,30 @@ class HeadUpTextPanel(LayoutWidget):
         current_line_height = 0
         if not self.minimized:
             line_count = 0
-            for index, text in enumerate(content_text):
+            start_index = 0
+            
+            # Continue from the last page that started before the changed content if nothing else changed since the last layout
+            pagination_key = (header_title, icon_size, self.font_size, self.icon_radius, tuple(self.padding), self.x, self.y, self.width, self.height, 
+                self.limit_x, self.limit_y, self.limit_width, self.limit_height)
+            page_checkpoints = []
+            if pagination_key == self.pagination_key:
+                page_checkpoints = [checkpoint for checkpoint in self.page_checkpoints if checkpoint["index"] < self.content_layout.changed_index]
+            self.pagination_key = pagination_key
+            self.page_checkpoints = page_checkpoints
+            
+            if len(page_checkpoints) > 0:
+                checkpoint = page_checkpoints[-1]
+                layout_pages = [checkpoint["page"] for checkpoint in page_checkpoints]
+                start_index = checkpoint["index"] + 1
+                current_page_text = [content_text[checkpoint["index"]]]
+                line_count = checkpoint["line_count"]
+                current_line_length = checkpoint["current_line_length"]
+                current_line_height = checkpoint["current_line_height"]
+                total_text_width = checkpoint["total_text_width"]
+                total_text_height = checkpoint["total_text_height"]
+            
+            for index in range(start_index, len(content_text)):
+                text = content_text[index]
                 line_count = line_count + 1 if text.x == 0 else line_count
                 current_line_length = current_line_length + text.width if text.x != 0 else text.width
                 total_text_width = max( total_text_width, current_line_length )
@@ -185,7 +215,7 @@ class HeadUpTextPanel(LayoutWidget):
                     height = self.limit_height
                     x = self.x if horizontal_alignment == "left" else self.limit_x + self.limit_width - width
                     y = self.limit_y if vertical_alignment == "top" else self.limit_y + self.limit_height - height
-                    layout_pages.append({
+                    layout_page = {
                         "rect": ui.Rect(x, y, width, height), 
                         "line_count": max(1, line_count - 1),
                         "header_text": header_text,
@@ -193,21 +223,33 @@ class HeadUpTextPanel(LayoutWidget):
                         "content_text": current_page_text,
                         "header_height": header_height,
                         "content_height": current_content_height
-                    })
+                    }
+                    layout_pages.append(layout_page)
                     
                     # Reset the variables
                     total_text_height = current_line_height
                     current_page_text = [text]
                     line_count = 1
+                    self.page_checkpoints.append({
+                        "index": index,
+                        "page": layout_page,
+                        "line_count": line_count,
+                        "current_line_length": current_line_length,
+                        "current_line_height": current_line_height,
+                        "total_text_width": total_text_width,
+                        "total_text_height": total_text_height
+                    })
                   
         # Make sure the remainder of the content gets placed on the final page
         if len(current_page_text) > 0 or len(layout_pages) == 0:
             
             # If we are dealing with a single line going over to the only other page
             # Just remove the footer to make up for space
+            # The page is copied to keep the page checkpoints unchanged
             if len(layout_pages) == 1 and line_count == 1:
+                layout_pages[0] = dict(layout_pages[0])
                 layout_pages[0]["line_count"] = layout_pages[0]["line_count"] + 1
-                layout_pages[0]["content_text"].extend(current_page_text)
+                layout_pages[0]["content_text"] = layout_pages[0]["content_text"] + current_page_text
                 layout_pages[0]["content_height"] += current_line_height
             else: 
                 width = min( self.limit_width, max(self.width, total_text_width + self.padding[1] + self.padding[3]))
@@ -252,7 +294,7 @@ class HeadUpTextPanel(LayoutWidget):
         if self.enabled:
             paint = canvas.paint
             if self.mark_layout_invalid and animation_tick == self.animation_max_duration - 1:
-                self.layout = self.layout_content(canvas, paint)
+                self.layout = self.update_layout(canvas, paint)
                 if self.page_index > len(self.layout) - 1:
                     self.page_index = len(self.layout) -1
             
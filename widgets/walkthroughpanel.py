@@ -442,7 +442,7 @@ class HeadUpWalkthroughPanel(LayoutWidget):
         if self.enabled and self.should_enable():
             paint = canvas.paint
             if self.mark_layout_invalid and animation_tick == self.animation_max_duration - 1:
-                self.layout = self.layout_content(canvas, paint)
+                self.layout = self.update_layout(canvas, paint)
                 if self.page_index > len(self.layout) - 1:
                     self.page_index = len(self.layout) -1
             